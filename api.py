@@ -0,0 +1,102 @@
+"""HTTP client for the SushiSocial posts API.
+
+All calls share one keep-alive requests.Session with a bounded connection
+pool, explicit timeouts and automatic retries of idempotent requests, so a
+feed refresh reuses an open TCP connection instead of dialling a new one.
+"""
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_TIMEOUT = (3.05, 10)
+
+
+class APIError(Exception):
+    """Raised when the posts API answers with an unexpected status."""
+    def __init__(self, response) -> None:
+        super().__init__(f"{response.request.method} {response.url} -> {response.status_code}")
+        self.response = response
+        self.status_code = response.status_code
+
+
+class SushiAPI:
+    """Pooled, retrying client for the posts API."""
+    def __init__(self, base_url: str, timeout=DEFAULT_TIMEOUT, retries: int = 3,
+                 backoff: float = 0.3, pool_size: int = 10) -> None:
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+        retry = Retry(total=retries, backoff_factor=backoff,
+                      status_forcelist=(502, 503, 504))
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+                              max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        # For calls that must not block for long, such as the sync at shutdown.
+        self.single_attempt = requests.Session()
+
+    def _request(self, method: str, path: str, retry: bool = True, **kwargs) -> requests.Response:
+        kwargs.setdefault('timeout', self.timeout)
+        session = self.session if retry else self.single_attempt
+        response = session.request(method, f"{self.base_url}{path}", **kwargs)
+        if response.status_code >= 400:
+            raise APIError(response)
+        return response
+
+    def list_posts(self, since_id=None, cursor=None, limit=None) -> list:
+        """Fetch posts newest first.
+
+        since_id restricts the result to posts newer than that id; cursor is
+        a (timestamp, id) keyset cursor selecting the page of posts older
+        than it; limit caps the page size.
+        """
+        params = {}
+        if since_id is not None:
+            params["since_id"] = since_id
+        if cursor is not None:
+            params["before_timestamp"], params["before_id"] = cursor
+        if limit is not None:
+            params["limit"] = limit
+        return self._request('GET', '/posts', params=params or None).json()
+
+    def list_posts_if_changed(self, etag=None, limit=None):
+        """Fetch the first page of posts unless it still matches etag.
+
+        Returns ``(posts, etag)``; posts is None when the server answered
+        304 Not Modified.
+        """
+        headers = {"If-None-Match": etag} if etag else None
+        params = None if limit is None else {"limit": limit}
+        response = self._request('GET', '/posts', params=params, headers=headers)
+        if response.status_code == 304:
+            return None, etag
+        return response.json(), response.headers.get("ETag")
+
+    def create_post(self, title: str, content: str, username: str) -> dict:
+        response = self._request('POST', '/posts', json={
+            "title": title,
+            "content": content,
+            "username": username,
+        })
+        return response.json() if response.content else {}
+
+    def batch(self, actions, timeout=None, retry: bool = True) -> list:
+        """Send many reactions/ratings/comments in one round-trip.
+
+        Each action is a dict such as ``{"type": "reaction", "post_id": 1,
+        "username": "sam", "is_like": True}``; WriteBehindQueue builds these
+        from its already coalesced batches. timeout overrides the client's
+        default; with retry=False a failed connection is not retried.
+        """
+        actions = list(actions)
+        if not actions:
+            return []
+        response = self._request('POST', '/batch', retry=retry, json={"actions": actions},
+                                 timeout=timeout or self.timeout)
+        return response.json().get("results", []) if response.content else []
+
+    def close(self) -> None:
+        self.session.close()
+        self.single_attempt.close()
+
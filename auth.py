@@ -0,0 +1,219 @@
+"""Password hashing, login sessions and remembered logins for SushiSocial.
+
+Passwords are stored as salted scrypt hashes in users.password, encoded
+as ``scrypt$n$r$p$salt$hash`` so the cost parameters can be raised later
+without breaking existing accounts. Hashing is deliberately slow, so
+Authenticator methods that hash must be called off the GUI thread.
+Accounts created before hashing still hold a plaintext password; it is
+checked in constant time and replaced with a hash on the next login.
+
+A successful login yields a Session that carries the user's id and
+profile, so later writes use the id directly instead of looking the
+username up again. With "remember me", a random token is written to a
+local file and only its SHA-256 digest is stored in the sessions table;
+the next start resumes the session from the token without a password.
+"""
+
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import sqlite3
+import sys
+
+from database import Database
+
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+SALT_BYTES = 16
+HASH_BYTES = 32
+SESSION_DAYS = 30
+
+USER_SQL = "SELECT id, username, password, bio, avatar_hash FROM users WHERE username = ?"
+
+RESUME_SQL = """
+    SELECT u.id, u.username, u.bio, u.avatar_hash
+    FROM sessions s
+    JOIN users u ON u.id = s.user_id
+    WHERE s.token_hash = ? AND s.expires > CURRENT_TIMESTAMP
+"""
+
+SESSIONS_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS sessions (
+        token_hash TEXT PRIMARY KEY,
+        user_id INTEGER NOT NULL,
+        created DATETIME DEFAULT CURRENT_TIMESTAMP,
+        expires DATETIME NOT NULL,
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_sessions_user ON sessions(user_id)",
+)
+
+
+class AuthError(Exception):
+    """Login or registration was refused; the message is shown to the user."""
+
+
+def default_token_path() -> str:
+    """Where a remembered login is kept: the user's config directory, not the cwd."""
+    if sys.platform == 'win32':
+        base = os.environ.get('APPDATA') or os.path.expanduser('~')
+    elif sys.platform == 'darwin':
+        base = os.path.expanduser('~/Library/Application Support')
+    else:
+        base = os.environ.get('XDG_CONFIG_HOME') or os.path.expanduser('~/.config')
+    return os.path.join(base, 'SushiSocial', 'session_token')
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode('ascii')
+
+
+def hash_password(password: str, salt: bytes = None) -> str:
+    """Return the encoded scrypt hash of password with a fresh random salt."""
+    if salt is None:
+        salt = os.urandom(SALT_BYTES)
+    digest = hashlib.scrypt(password.encode(), salt=salt, n=SCRYPT_N, r=SCRYPT_R,
+                            p=SCRYPT_P, dklen=HASH_BYTES)
+    return f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${_b64(salt)}${_b64(digest)}"
+
+
+def verify_password(password: str, stored: str) -> bool:
+    """Check password against a stored hash, or a legacy plaintext password."""
+    if not stored:
+        return False
+    if not stored.startswith('scrypt$'):
+        return hmac.compare_digest(password.encode(), stored.encode())
+    try:
+        _, n, r, p, salt, expected = stored.split('$')
+        expected = base64.b64decode(expected)
+        digest = hashlib.scrypt(password.encode(), salt=base64.b64decode(salt), n=int(n),
+                                r=int(r), p=int(p), dklen=len(expected))
+    except ValueError:
+        return False
+    return hmac.compare_digest(digest, expected)
+
+
+def needs_rehash(stored: str) -> bool:
+    """True for plaintext passwords and hashes made with other cost parameters."""
+    return not stored.startswith(f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}$")
+
+
+def token_digest(token: str) -> str:
+    # Tokens are 256 random bits, so a fast hash is enough to keep the
+    # stored value useless to someone who reads the database.
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class Session:
+    """The logged-in user's id and profile, resolved once at login."""
+    def __init__(self, user_id: int, username: str, bio: str = "",
+                 avatar_hash: str = None, token: str = None) -> None:
+        self.user_id = user_id
+        self.username = username
+        self.bio = bio or ""
+        self.avatar_hash = avatar_hash
+        self.token = token
+
+
+class Authenticator:
+    """Logs users in and out against the users and sessions tables.
+
+    token_path is the file a remembered login is kept in; with None,
+    logins are never remembered.
+    """
+    # Verified against unknown usernames so they take as long as wrong passwords.
+    _dummy_hash = None
+
+    def __init__(self, db: Database, token_path: str = None) -> None:
+        self.db = db
+        self.token_path = token_path
+
+    def login(self, username: str, password: str, remember: bool = False) -> Session:
+        """Worker thread: verify credentials and return the new Session."""
+        row = self.db.fetchone(USER_SQL, (username,))
+        if row is None:
+            if Authenticator._dummy_hash is None:
+                Authenticator._dummy_hash = hash_password('')
+            verify_password(password, Authenticator._dummy_hash)
+            raise AuthError("Invalid credentials")
+        user_id, username, stored, bio, avatar_hash = row
+        if not verify_password(password, stored):
+            raise AuthError("Invalid credentials")
+        if needs_rehash(stored):
+            with self.db.transaction() as conn:
+                conn.execute("UPDATE users SET password = ? WHERE id = ?",
+                             (hash_password(password), user_id))
+        session = Session(user_id, username, bio, avatar_hash)
+        if remember:
+            self.remember(session)
+        return session
+
+    def register(self, username: str, password: str, remember: bool = False) -> Session:
+        """Worker thread: create an account and return its Session."""
+        if not username or not password:
+            raise AuthError("Username and password required")
+        password_hash = hash_password(password)
+        try:
+            with self.db.transaction() as conn:
+                user_id = conn.execute(
+                    "INSERT INTO users (username, password) VALUES (?, ?)",
+                    (username, password_hash),
+                ).lastrowid
+        except sqlite3.IntegrityError:
+            raise AuthError("Username already exists") from None
+        session = Session(user_id, username)
+        if remember:
+            self.remember(session)
+        return session
+
+    def remember(self, session: Session) -> None:
+        """Issue a session token and save it so the next start can resume."""
+        if self.token_path is None:
+            return
+        token = secrets.token_urlsafe(32)
+        with self.db.transaction() as conn:
+            conn.execute(
+                "INSERT INTO sessions (token_hash, user_id, expires) "
+                "VALUES (?, ?, datetime('now', ?))",
+                (token_digest(token), session.user_id, f"+{SESSION_DAYS} days"),
+            )
+        os.makedirs(os.path.dirname(self.token_path) or '.', mode=0o700, exist_ok=True)
+        temp_path = f"{self.token_path}.tmp"
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='ascii') as f:
+            f.write(token)
+        os.replace(temp_path, self.token_path)
+        session.token = token
+
+    def resume(self):
+        """Return the Session of a remembered login, or None if there is no valid one."""
+        if self.token_path is None or not os.path.exists(self.token_path):
+            return None
+        try:
+            with open(self.token_path, encoding='ascii') as f:
+                token = f.read().strip()
+        except (OSError, ValueError):
+            return None
+        row = self.db.fetchone(RESUME_SQL, (token_digest(token),))
+        if row is None:
+            self._forget_token(token)
+            return None
+        return Session(*row, token=token)
+
+    def logout(self, session: Session) -> None:
+        """Revoke the session's token, if it has one."""
+        if session.token is not None:
+            self._forget_token(session.token)
+            session.token = None
+
+    def _forget_token(self, token: str) -> None:
+        with self.db.transaction() as conn:
+            conn.execute("DELETE FROM sessions WHERE token_hash = ? OR expires <= CURRENT_TIMESTAMP",
+                         (token_digest(token),))
+        try:
+            os.unlink(self.token_path)
+        except FileNotFoundError:
+            pass
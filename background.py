@@ -0,0 +1,105 @@
+"""Off-main-thread execution of network and database work for SushiSocial.
+
+Blocking calls are wrapped in a Task and run on a QThreadPool. Results and
+errors come back through Qt signals, which are delivered on the GUI thread,
+so slots may touch widgets directly. Tasks submitted under a key supersede
+the previous task with the same key: if it has not started it is removed
+from the pool, otherwise its result is discarded.
+"""
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+
+class TaskSignals(QObject):
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(object)
+    done = pyqtSignal()
+
+
+class Task(QRunnable):
+    """A callable run on the thread pool that reports back through signals."""
+    def __init__(self, fn, *args, **kwargs) -> None:
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.cancelled = False
+        self.signals = TaskSignals()
+        self.setAutoDelete(False)
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+    def run(self) -> None:
+        try:
+            if self.cancelled:
+                return
+            try:
+                result = self.fn(*self.args, **self.kwargs)
+            except Exception as e:
+                if not self.cancelled:
+                    self.signals.failed.emit(e)
+                return
+            if not self.cancelled:
+                self.signals.finished.emit(result)
+        finally:
+            self.signals.done.emit()
+
+
+class BackgroundRunner(QObject):
+    """Submits Tasks to a private thread pool and tracks the latest one per key."""
+    def __init__(self, parent=None, max_threads: int = 4) -> None:
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        # Keep pool threads alive so their per-thread SQLite connections are reused.
+        self.pool.setExpiryTimeout(-1)
+        self._latest = {}
+        self._running = set()
+
+    def submit(self, fn, *args, key=None, on_done=None, on_error=None, **kwargs) -> Task:
+        """Run fn(*args, **kwargs) in the background, cancelling any older task with key."""
+        if key is not None:
+            self.cancel(key)
+        task = Task(fn, *args, **kwargs)
+        if on_done is not None:
+            task.signals.finished.connect(lambda result: self._deliver(task, key, on_done, result))
+        if on_error is not None:
+            task.signals.failed.connect(lambda error: self._deliver(task, key, on_error, error))
+        task.signals.done.connect(lambda: self._forget(task, key))
+        if key is not None:
+            self._latest[key] = task
+        self._running.add(task)
+        self.pool.start(task)
+        return task
+
+    def cancel(self, key) -> None:
+        """Cancel the most recent task submitted under key, if it is still pending."""
+        task = self._latest.pop(key, None)
+        if task is not None:
+            task.cancel()
+            # A task that already started stays referenced until it reports done.
+            if self.pool.tryTake(task):
+                self._running.discard(task)
+
+    def pending(self, key) -> bool:
+        """True while a task submitted under key has not reported back."""
+        return key in self._latest
+
+    def _deliver(self, task, key, callback, value) -> None:
+        # The worker may have emitted just before the task was cancelled or
+        # superseded; such a result is still queued for the GUI thread.
+        if task.cancelled or (key is not None and self._latest.get(key) is not task):
+            return
+        callback(value)
+
+    def _forget(self, task, key) -> None:
+        self._running.discard(task)
+        if key is not None and self._latest.get(key) is task:
+            del self._latest[key]
+
+    def shutdown(self) -> None:
+        for task in list(self._running):
+            task.cancel()
+        self.pool.clear()
+        self.pool.waitForDone()
@@ -0,0 +1,222 @@
+"""SushiSocial client data paths against synthetic databases of growing size.
+
+For each --posts size a social.db is seeded with users, posts,
+reactions, ratings and comments, then the hot SQLite paths are timed:
+feed pages (read locally while the posts API is unreachable), batched
+post stats, full-text search, the trigger-maintained writes, and startup (opening a connection, checking migrations). When
+PyQt6 is available, SushiSocial.update_posts_display is also timed on
+an offscreen platform, both alone and followed by a full repaint of the
+feed view.
+
+Seeded databases are cached in the temp directory and reused across
+runs with the same size and seed. Each run works on a copy, so the timed
+writes never accumulate in the cached database.
+
+    python benchmarks/bench_client.py --posts 1000 10000 100000 1000000
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import summarize, time_calls, write_results  # noqa: E402
+from database import Database  # noqa: E402
+from migrations import MIGRATIONS, migrate  # noqa: E402
+from repository import PAGE_SIZE, FeedRepository, post_cursor  # noqa: E402
+from search import PostSearch  # noqa: E402
+
+WORDS = ('sushi', 'ramen', 'nigiri', 'maki', 'wasabi', 'salmon', 'tuna', 'rice', 'tempura',
+         'miso', 'udon', 'sashimi', 'ginger', 'soy', 'seaweed', 'matcha', 'mochi', 'bento')
+SEED_BATCH = 10000
+# Schema version after the base tables and blob columns; indexes, post_stats
+# and the FTS index are built by migrate() in bulk after seeding.
+SEED_VERSION = 2
+
+
+def sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def seed(path, posts, rng, users, reactions, comments):
+    """Create a database at path with the given number of posts."""
+    db = Database(path)
+    conn = db.connection()
+    conn.execute("BEGIN")
+    for step in MIGRATIONS[:SEED_VERSION]:
+        step(conn)
+    conn.execute(f"PRAGMA user_version = {SEED_VERSION}")
+    conn.executemany(
+        "INSERT INTO users (id, username, password) VALUES (?, ?, 'bench')",
+        ((user_id, f"user{user_id}") for user_id in range(1, users + 1)),
+    )
+    epoch = datetime(2024, 1, 1)
+    for first in range(1, posts + 1, SEED_BATCH):
+        ids = range(first, min(first + SEED_BATCH, posts + 1))
+        conn.executemany(
+            "INSERT INTO posts (id, title, content, user_id, timestamp) VALUES (?, ?, ?, ?, ?)",
+            ((post_id, sentence(rng, 4), sentence(rng, 30), rng.randint(1, users),
+              (epoch + timedelta(seconds=post_id * 37)).strftime('%Y-%m-%d %H:%M:%S'))
+             for post_id in ids),
+        )
+        reaction_rows, rating_rows, comment_rows = [], [], []
+        for post_id in ids:
+            for user_id in rng.sample(range(1, users + 1), min(users, rng.randint(0, 2 * reactions))):
+                reaction_rows.append((post_id, user_id, rng.random() < 0.8))
+                if rng.random() < 0.3:
+                    rating_rows.append((user_id, post_id, rng.randint(1, 5)))
+            for _ in range(rng.randint(0, 2 * comments)):
+                comment_rows.append((sentence(rng, 8), rng.randint(1, users), post_id))
+        conn.executemany(
+            "INSERT INTO post_reactions (post_id, user_id, is_like) VALUES (?, ?, ?)", reaction_rows)
+        conn.executemany(
+            "INSERT INTO ratings (user_id, post_id, rating) VALUES (?, ?, ?)", rating_rows)
+        conn.executemany(
+            "INSERT INTO comments (content, user_id, post_id) VALUES (?, ?, ?)", comment_rows)
+    conn.commit()
+    migrate(db)
+    conn.execute("ANALYZE")
+    db.close()
+
+
+def open_seeded(args, posts):
+    path = os.path.join(tempfile.gettempdir(), f"sushi-bench-{posts}-{args.seed}.db")
+    if args.reseed or not os.path.exists(path):
+        remove_database(path)
+        rng = random.Random(args.seed)
+        users = max(100, posts // 100)
+        started = time.perf_counter()
+        seed(path, posts, rng, users, args.reactions, args.comments)
+        print(f"Seeded {posts} posts in {time.perf_counter() - started:.1f}s: {path}")
+    return path
+
+
+def copy_seeded(path):
+    """Return a scratch copy of the cached database at path for one run."""
+    fd, copy = tempfile.mkstemp(prefix='sushi-bench-run-', suffix='.db')
+    os.close(fd)
+    shutil.copy(path, copy)
+    return copy
+
+
+def remove_database(path):
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.unlink(path + suffix)
+
+
+def bench_queries(db, posts, args, rng):
+    repo = FeedRepository(db)
+    repo.viewer = 1
+    search = PostSearch(db)
+    first_page = repo.page_posts(None, PAGE_SIZE)
+    page_ids = [post[3] for post in first_page]
+    middle = db.fetchone("SELECT timestamp, id FROM posts WHERE id = ?", (posts // 2,))
+    users = db.fetchvalue("SELECT COUNT(*) FROM users")
+
+    def react():
+        with db.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO post_reactions (post_id, user_id, is_like) VALUES (?, ?, ?)",
+                (rng.randint(1, posts), rng.randint(1, users), rng.random() < 0.5))
+
+    def comment():
+        with db.transaction() as conn:
+            conn.execute("INSERT INTO comments (content, user_id, post_id) VALUES (?, ?, ?)",
+                         ('benchmark comment', rng.randint(1, users), rng.randint(1, posts)))
+
+    def open_database():
+        fresh = Database(db.path)
+        migrate(fresh)
+        fresh.close()
+
+    paths = {
+        'first_page': lambda: repo.page_posts(None, PAGE_SIZE),
+        'next_page': lambda: repo.page_posts(post_cursor(first_page[-1]), PAGE_SIZE),
+        'deep_page': lambda: repo.page_posts(tuple(middle), PAGE_SIZE),
+        'post_stats_page': lambda: repo.post_stats(page_ids),
+        'search': lambda: search.search('sushi ramen'),
+        'search_prefix': lambda: search.search('wasa'),
+        'reaction_write': react,
+        'comment_write': comment,
+        'open_and_migrate': open_database,
+    }
+    return {name: summarize(time_calls(fn, args.repeat)) for name, fn in paths.items()}
+
+
+def bench_display(db, args):
+    """Time update_posts_display offscreen, or explain why it was skipped."""
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    try:
+        from PyQt6.QtWidgets import QApplication
+        from feed_view import FeedModel, FeedView
+        from soy import COLORS, SushiSocial
+    except ImportError as e:
+        return {'skipped': f"PyQt6 client unavailable: {e}"}
+    app = QApplication.instance() or QApplication([])
+    model = FeedModel()
+    view = FeedView(COLORS)
+    view.setModel(model)
+    view.resize(900, 1200)
+    repo = FeedRepository(db)
+    window = SimpleNamespace(feed_model=model)
+    posts = repo.page_posts(None, args.display_posts)
+    stats = repo.post_stats(post[3] for post in posts)
+
+    def display():
+        SushiSocial.update_posts_display(window, posts, stats)
+        app.processEvents()
+
+    def display_and_paint():
+        display()
+        view.grab()
+
+    return {
+        'update_posts_display': summarize(time_calls(display, args.repeat)),
+        'update_and_paint': summarize(time_calls(display_and_paint, args.repeat)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--reactions', type=int, default=5, help="mean reactions per post")
+    parser.add_argument('--comments', type=int, default=3, help="mean comments per post")
+    parser.add_argument('--display-posts', type=int, default=PAGE_SIZE,
+                        help="posts shown by update_posts_display")
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--reseed', action='store_true', help="rebuild cached databases")
+    parser.add_argument('--output', help="result file (default benchmarks/results/client-<rev>.json)")
+    args = parser.parse_args()
+    params = {key: value for key, value in vars(args).items() if key not in ('output', 'reseed')}
+    results = {}
+    for posts in args.posts:
+        path = copy_seeded(open_seeded(args, posts))
+        db = Database(path)
+        rng = random.Random(args.seed)
+        try:
+            # Run the writes last so reads see only the seeded data.
+            results[str(posts)] = {
+                'display': bench_display(db, args),
+                'queries': bench_queries(db, posts, args, rng),
+            }
+        finally:
+            db.close()
+            remove_database(path)
+        print(json.dumps({posts: results[str(posts)]}, indent=2))
+    print(f"Saved {write_results('client', params, results, args.output)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""Encode/decode cost and wire size of each socket protocol codec.
+
+Runs in-process, without a server, over the messages that dominate the
+wire: heartbeat and heartbeat_ack round-trips, text threads, threads with
+an inline image and blob chunks.
+
+    python benchmarks/bench_codecs.py --image-size 65536 --repeat 20000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from codec import CODECS  # noqa: E402
+
+
+def sample_messages(image_size):
+    image = os.urandom(image_size)
+    return {
+        'heartbeat': {'type': 'heartbeat'},
+        'heartbeat_ack': {'type': 'heartbeat_ack', 'interval': 10.0, 'timeout': 30.0},
+        'thread': {'type': 'thread', 'author': 'bench', 'content': 'hello sushi ' * 8, 'seq': 123456},
+        'thread_image': {'type': 'thread', 'author': 'bench', 'content': 'look', 'image': image},
+        'blob': {'type': 'blob', 'hash': 'ab' * 32, 'offset': 0, 'size': image_size, 'data': image},
+    }
+
+
+def per_call_us(fn, arg, repeat):
+    began = time.perf_counter()
+    for _ in range(repeat):
+        fn(arg)
+    return (time.perf_counter() - began) / repeat * 1e6
+
+
+def run(codec, name, message, repeat):
+    payload = codec.encode(message)
+    assert codec.decode(payload) == message, f"{codec.name} does not round-trip {name}"
+    return {
+        'codec': codec.name,
+        'message': name,
+        'bytes': len(payload),
+        'encode_us': round(per_call_us(codec.encode, message, repeat), 2),
+        'decode_us': round(per_call_us(codec.decode, payload, repeat), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--image-size', type=int, default=64 * 1024)
+    parser.add_argument('--repeat', type=int, default=20000)
+    parser.add_argument('--codecs', nargs='+', default=list(CODECS), choices=list(CODECS))
+    args = parser.parse_args()
+    for name, message in sample_messages(args.image_size).items():
+        # Image-sized payloads are far slower per call; keep their runs short.
+        repeat = args.repeat if 'image' not in name and name != 'blob' else max(args.repeat // 100, 10)
+        for codec_name in args.codecs:
+            print(json.dumps(run(CODECS[codec_name], name, message, repeat)))
+
+
+if __name__ == '__main__':
+    main()
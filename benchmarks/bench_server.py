@@ -0,0 +1,192 @@
+"""Load test of SushiServer: throughput and broadcast latency under simulated clients.
+
+Starts server.py on 127.0.0.1 with throwaway blob and thread-log
+directories, then opens --clients connections spread over
+--client-procs processes. Every connection sends heartbeats and reads
+broadcasts; the first --senders of them also post threads at --rate per
+second with an optional inline image. Each thread carries its send time,
+so receivers measure send-to-delivery latency, and heartbeat round trips
+are timed against their heartbeat_ack.
+
+    python benchmarks/bench_server.py --clients 200 --senders 10 --rate 50 --image-size 16384
+"""
+
+import argparse
+import base64
+import json
+import multiprocessing
+import os
+import selectors
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import deque
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import summarize, wait_for_port, write_results  # noqa: E402
+from framing import FrameDecoder, encode_frame  # noqa: E402
+
+MAX_SAMPLES = 200000
+HEARTBEAT = encode_frame(json.dumps({'type': 'heartbeat'}).encode())
+
+
+class SimulatedClient:
+    """One connection's send schedule, decoder and pending heartbeats."""
+    def __init__(self, sock, sender, rate, heartbeat_interval, image, now):
+        self.sock = sock
+        self.decoder = FrameDecoder()
+        self.sender = sender
+        self.interval = 1.0 / rate if sender and rate else None
+        self.next_thread = now
+        self.heartbeat_interval = heartbeat_interval
+        self.next_heartbeat = now
+        self.heartbeats = deque()
+        self.image = image
+
+    def due(self, now, stats):
+        if now >= self.next_heartbeat:
+            self.heartbeats.append(time.monotonic())
+            self.sock.sendall(HEARTBEAT)
+            self.next_heartbeat += self.heartbeat_interval
+        if self.interval is not None and now >= self.next_thread:
+            self.sock.sendall(encode_frame(json.dumps({
+                'type': 'thread', 'author': 'bench', 'content': 'load test',
+                'image': self.image, 'sent_at': time.monotonic(),
+            }).encode()))
+            stats['sent'] += 1
+            self.next_thread += self.interval
+
+    def receive(self, data, stats, latencies, heartbeat_rtts):
+        now = time.monotonic()
+        for payload in self.decoder.feed(data):
+            message = json.loads(payload)
+            kind = message.get('type')
+            if kind == 'thread' and 'sent_at' in message:
+                stats['delivered'] += 1
+                if len(latencies) < MAX_SAMPLES:
+                    latencies.append(now - message['sent_at'])
+            elif kind == 'heartbeat_ack' and self.heartbeats:
+                heartbeat_rtts.append(now - self.heartbeats.popleft())
+
+
+def run_clients(host, port, connections, first_index, args, start, results):
+    """Drive a share of the connections from one process until the run ends."""
+    image = base64.b64encode(os.urandom(args.image_size)).decode() if args.image_size else None
+    selector = selectors.DefaultSelector()
+    clients = []
+    now = time.monotonic()
+    for index in range(first_index, first_index + connections):
+        sock = socket.create_connection((host, port))
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        client = SimulatedClient(sock, index < args.senders, args.rate,
+                                 args.heartbeat_interval, image, now)
+        selector.register(sock, selectors.EVENT_READ, client)
+        clients.append(client)
+    start.wait()
+    stats = {'sent': 0, 'delivered': 0}
+    latencies, heartbeat_rtts = [], []
+    began = time.monotonic()
+    for client in clients:
+        client.next_thread = client.next_heartbeat = began
+    stop_sending = began + args.duration
+    # Keep reading a little after the last send so in-flight broadcasts land.
+    stop = stop_sending + args.drain
+    while True:
+        now = time.monotonic()
+        if now >= stop:
+            break
+        if now < stop_sending:
+            for client in clients:
+                client.due(now, stats)
+        for key, _ in selector.select(timeout=0.001):
+            data = key.fileobj.recv(1 << 20)
+            if data:
+                key.data.receive(data, stats, latencies, heartbeat_rtts)
+    for client in clients:
+        client.sock.close()
+    results.put((stats, latencies, heartbeat_rtts))
+
+
+def run(args):
+    workdir = tempfile.mkdtemp(prefix='sushi-bench-')
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, 'server.py'), '--host', args.host,
+         '--port', str(args.port), '--engine', args.engine, '--queue-size', str(args.queue_size),
+         '--blob-dir', os.path.join(workdir, 'blobs'), '--log-dir', os.path.join(workdir, 'log'),
+         '--metrics-port', '0', '--log-level', 'WARNING'],
+    )
+    try:
+        wait_for_port(args.host, args.port)
+        start, results = multiprocessing.Event(), multiprocessing.Queue()
+        shares = [args.clients // args.client_procs + (i < args.clients % args.client_procs)
+                  for i in range(args.client_procs)]
+        processes = []
+        first = 0
+        for share in shares:
+            processes.append(multiprocessing.Process(target=run_clients, args=(
+                args.host, args.port, share, first, args, start, results)))
+            first += share
+        for process in processes:
+            process.start()
+        time.sleep(0.5)
+        start.set()
+        sent = delivered = 0
+        latencies, heartbeat_rtts = [], []
+        for _ in processes:
+            stats, process_latencies, process_rtts = results.get()
+            sent += stats['sent']
+            delivered += stats['delivered']
+            latencies += process_latencies
+            heartbeat_rtts += process_rtts
+        for process in processes:
+            process.join()
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+    expected = sent * (args.clients - 1)
+    return {
+        'threads_sent': sent,
+        'deliveries': delivered,
+        'deliveries_expected': expected,
+        'delivery_ratio': round(delivered / expected, 4) if expected else None,
+        'threads_per_sec': round(sent / args.duration, 1),
+        'deliveries_per_sec': round(delivered / args.duration, 1),
+        'broadcast_latency': summarize(latencies),
+        'heartbeat_rtt': summarize(heartbeat_rtts),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5056)
+    parser.add_argument('--engine', choices=('threaded', 'asyncio'), default='asyncio')
+    parser.add_argument('--queue-size', type=int, default=4096)
+    parser.add_argument('--clients', type=int, default=50)
+    parser.add_argument('--client-procs', type=int, default=2)
+    parser.add_argument('--senders', type=int, default=5)
+    parser.add_argument('--rate', type=float, default=20.0,
+                        help="threads per second per sender")
+    parser.add_argument('--image-size', type=int, default=0,
+                        help="bytes of random image attached to every thread")
+    parser.add_argument('--heartbeat-interval', type=float, default=1.0)
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--drain', type=float, default=1.0,
+                        help="seconds to keep reading after the last send")
+    parser.add_argument('--output', help="result file (default benchmarks/results/server-<rev>.json)")
+    args = parser.parse_args()
+    params = {key: value for key, value in vars(args).items() if key not in ('output', 'host', 'port')}
+    results = run(args)
+    print(json.dumps(results, indent=2))
+    print(f"Saved {write_results('server', params, results, args.output)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""Local-only benchmark of thread fan-out throughput versus --workers.
+
+Starts server.py on 127.0.0.1 for each worker count, connects listener
+processes and sender processes, and reports delivered messages per second.
+The thread log is disabled for every run, as run_workers does whenever
+there is more than one worker, so all worker counts do the same work.
+
+    python benchmarks/bench_workers.py --workers 1 2 4 --messages 2000
+"""
+
+import argparse
+import base64
+import json
+import multiprocessing
+import os
+import selectors
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import wait_for_port, write_results  # noqa: E402
+from framing import FrameDecoder, encode_frame  # noqa: E402
+
+
+def listen(host, port, connections, expected, ready, results):
+    selector = selectors.DefaultSelector()
+    for _ in range(connections):
+        sock = socket.create_connection((host, port))
+        sock.setblocking(False)
+        selector.register(sock, selectors.EVENT_READ, FrameDecoder())
+    ready.put(True)
+    received = 0
+    deadline = time.monotonic() + 60
+    while received < expected and time.monotonic() < deadline:
+        for key, _ in selector.select(timeout=1):
+            data = key.fileobj.recv(1 << 20)
+            if data:
+                received += len(key.data.feed(data))
+    results.put((received, time.monotonic()))
+
+
+def send(host, port, messages, image_size, start):
+    image = base64.b64encode(os.urandom(image_size)).decode() if image_size else None
+    payload = encode_frame(json.dumps({
+        'type': 'thread', 'author': 'bench', 'content': 'hello', 'image': image
+    }).encode())
+    sock = socket.create_connection((host, port))
+    start.wait()
+    for _ in range(messages):
+        sock.sendall(payload)
+    time.sleep(1)
+    sock.close()
+
+
+def run(workers, args):
+    workdir = tempfile.mkdtemp(prefix='sushi-bench-')
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, 'server.py'), '--host', args.host,
+         '--port', str(args.port), '--engine', args.engine, '--workers', str(workers),
+         '--queue-size', '100000', '--blob-dir', os.path.join(workdir, 'blobs'),
+         '--log-dir', '', '--metrics-port', '0', '--log-level', 'WARNING'],
+    )
+    try:
+        wait_for_port(args.host, args.port)
+        time.sleep(0.5)
+        per_listener = args.listeners // args.listener_procs
+        expected = args.senders * args.messages * per_listener
+        ready, results = multiprocessing.Queue(), multiprocessing.Queue()
+        listeners = [
+            multiprocessing.Process(target=listen, args=(
+                args.host, args.port, per_listener, expected, ready, results))
+            for _ in range(args.listener_procs)
+        ]
+        for process in listeners:
+            process.start()
+        for _ in listeners:
+            ready.get()
+        start = multiprocessing.Event()
+        senders = [
+            multiprocessing.Process(target=send, args=(
+                args.host, args.port, args.messages, args.image_size, start))
+            for _ in range(args.senders)
+        ]
+        for process in senders:
+            process.start()
+        time.sleep(0.5)
+        began = time.monotonic()
+        start.set()
+        received, finished = 0, began
+        for _ in listeners:
+            count, done = results.get()
+            received += count
+            finished = max(finished, done)
+        for process in senders + listeners:
+            process.join()
+        elapsed = finished - began
+        return {'workers': workers, 'delivered': received,
+                'expected': expected * args.listener_procs,
+                'seconds': round(elapsed, 3),
+                'messages_per_sec': round(received / elapsed, 1) if elapsed else None}
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--engine', choices=('threaded', 'asyncio'), default='asyncio')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--senders', type=int, default=4)
+    parser.add_argument('--listeners', type=int, default=64)
+    parser.add_argument('--listener-procs', type=int, default=4)
+    parser.add_argument('--messages', type=int, default=1000)
+    parser.add_argument('--image-size', type=int, default=0)
+    parser.add_argument('--output', help="result file (default benchmarks/results/workers-<rev>.json)")
+    args = parser.parse_args()
+    params = {key: value for key, value in vars(args).items() if key not in ('output', 'host', 'port')}
+    print(f"cpus: {os.cpu_count()}")
+    results = {}
+    for workers in args.workers:
+        results[str(workers)] = run(workers, args)
+        print(json.dumps(results[str(workers)]))
+    print(f"Saved {write_results('workers', params, results, args.output)}")
+
+
+if __name__ == '__main__':
+    main()
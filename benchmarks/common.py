@@ -0,0 +1,99 @@
+"""Helpers shared by the benchmark scripts: timing, percentiles and result files.
+
+Every benchmark writes one JSON document holding the git revision,
+the platform, the parameters it ran with and its measurements. Comparing
+two such files with ``compare.py`` shows regressions between commits.
+"""
+
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+
+def wait_for_port(host, port, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((host, port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"Server did not start on {host}:{port}")
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of values; None when there are none."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples, scale=1e3, unit='ms'):
+    """Count, mean, p50, p99 and max of samples in seconds, scaled to unit."""
+    if not samples:
+        return {'count': 0}
+    return {
+        'count': len(samples),
+        f'mean_{unit}': round(sum(samples) / len(samples) * scale, 4),
+        f'p50_{unit}': round(percentile(samples, 0.50) * scale, 4),
+        f'p99_{unit}': round(percentile(samples, 0.99) * scale, 4),
+        f'max_{unit}': round(max(samples) * scale, 4),
+    }
+
+
+def time_calls(fn, repeat, warmup=3):
+    """Call fn repeatedly and return the duration of each call in seconds."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+            text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(name, params, results, output=None):
+    """Save a benchmark run as JSON and return the path written.
+
+    The default path is ``benchmarks/results/<name>-<revision>.json``, so
+    runs on different commits sit side by side.
+    """
+    revision = git_revision()
+    document = {
+        'benchmark': name,
+        'revision': revision,
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'params': params,
+        'results': results,
+    }
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{name}-{revision or 'unknown'}.json")
+    with open(output, 'w') as f:
+        json.dump(document, f, indent=2)
+        f.write('\n')
+    return output
@@ -0,0 +1,63 @@
+"""Compare two benchmark result files and flag regressions.
+
+Walks both documents' ``results`` and prints every numeric measurement
+present in both, with the relative change. Latency-like values (``_ms``,
+``_us``) regress when they grow and throughput values (``_per_sec``) when
+they shrink; changes beyond --threshold are marked.
+
+    python benchmarks/compare.py benchmarks/results/client-abc123.json benchmarks/results/client-def456.json
+"""
+
+import argparse
+import json
+
+
+def flatten(node, prefix=''):
+    if isinstance(node, dict):
+        for key, value in node.items():
+            yield from flatten(value, f"{prefix}.{key}" if prefix else key)
+    elif isinstance(node, (int, float)) and not isinstance(node, bool):
+        yield prefix, node
+
+
+def direction(name):
+    """+1 if larger is worse, -1 if smaller is worse, 0 if neither."""
+    leaf = name.rsplit('.', 1)[-1]
+    if leaf.endswith(('_ms', '_us')):
+        return 1
+    if leaf.endswith('_per_sec'):
+        return -1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help="relative change reported as a regression or improvement")
+    args = parser.parse_args()
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    print(f"{baseline.get('revision')} -> {candidate.get('revision')}")
+    before = dict(flatten(baseline['results']))
+    regressions = 0
+    for name, after in flatten(candidate['results']):
+        if name not in before or not before[name]:
+            continue
+        change = (after - before[name]) / abs(before[name])
+        worse = direction(name) * change
+        mark = ''
+        if worse > args.threshold:
+            mark = '  REGRESSION'
+            regressions += 1
+        elif worse < -args.threshold:
+            mark = '  improved'
+        print(f"{name:60} {before[name]:>12g} {after:>12g} {change:+8.1%}{mark}")
+    raise SystemExit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""Content-addressed blob storage shared by SushiServer and SushiSocial.
+
+Blobs are immutable files named by the SHA-256 of their contents, so the
+same image is stored once however many posts or profiles use it, and
+messages and database rows only need to carry the 64-character hash.
+Reads go through mmap, so serving a byte range does not load the whole
+file.
+"""
+
+import hashlib
+import mmap
+import os
+import re
+import tempfile
+
+HASH_PATTERN = re.compile(r'[0-9a-f]{64}')
+CHUNK_SIZE = 1024 * 1024
+# Default store directory, relative to the working directory.
+BLOB_DIR = "blobs"
+
+
+class BlobNotFound(KeyError):
+    """Raised when a requested hash is not in the store."""
+
+
+class BlobStore:
+    """Directory of blobs laid out as ``root/ab/abcdef...``."""
+    def __init__(self, root: str = BLOB_DIR) -> None:
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, digest: str) -> str:
+        if not HASH_PATTERN.fullmatch(digest or ''):
+            raise ValueError(f"Invalid blob hash {digest!r}")
+        return os.path.join(self.root, digest[:2], digest)
+
+    def has(self, digest: str) -> bool:
+        return os.path.exists(self.path(digest))
+
+    def size(self, digest: str) -> int:
+        try:
+            return os.path.getsize(self.path(digest))
+        except FileNotFoundError:
+            raise BlobNotFound(digest) from None
+
+    def put(self, data: bytes) -> str:
+        """Store data and return its hash; storing existing content is a no-op."""
+        digest = hashlib.sha256(data).hexdigest()
+        if not self.has(digest):
+            self._write(digest, [data])
+        return digest
+
+    def put_file(self, source_path: str) -> str:
+        """Hash and copy a file into the store one chunk at a time.
+
+        The copy is streamed to a temporary file in the store while it is
+        hashed, then renamed to its hash, so large files are never held in
+        memory.
+        """
+        sha = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as out, open(source_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                    sha.update(chunk)
+                    out.write(chunk)
+            digest = sha.hexdigest()
+            if self.has(digest):
+                os.unlink(temp_path)
+            else:
+                self._place(temp_path, digest)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        return digest
+
+    def _write(self, digest: str, chunks) -> None:
+        fd, temp_path = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+        self._place(temp_path, digest)
+
+    def _place(self, temp_path: str, digest: str) -> None:
+        target = self.path(digest)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(temp_path, target)
+
+    def read(self, digest: str, offset: int = 0, length: int = None) -> bytes:
+        """Return ``length`` bytes of a blob starting at offset (to the end if None)."""
+        try:
+            f = open(self.path(digest), 'rb')
+        except FileNotFoundError:
+            raise BlobNotFound(digest) from None
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            end = size if length is None else min(size, offset + length)
+            if offset >= end:
+                return b''
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                return view[offset:end]
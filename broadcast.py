@@ -0,0 +1,126 @@
+"""Fan-out primitives for SushiServer: bounded outbound queues and a client registry.
+
+Each connection owns an OutboundQueue that its writer (thread or task)
+drains, so broadcasting a post only costs an append per recipient and a
+slow reader can never stall the sender or the other subscribers.
+"""
+
+import threading
+from collections import deque
+
+DROP_OLDEST = 'drop_oldest'
+DISCONNECT = 'disconnect'
+COALESCE = 'coalesce'
+SLOW_CONSUMER_POLICIES = (DROP_OLDEST, DISCONNECT, COALESCE)
+
+
+class OutboundQueue:
+    """Bounded queue of encoded frames waiting to be written to one client.
+
+    When the queue is full the slow-consumer policy decides what happens:
+    ``drop_oldest`` discards the oldest pending frame, ``disconnect`` rejects
+    the frame so the caller can drop the client, and ``coalesce`` replaces a
+    pending frame that carries the same key (falling back to dropping the
+    oldest one when nothing can be merged).
+    """
+    def __init__(self, maxsize: int = 256, policy: str = DROP_OLDEST, wakeup=None) -> None:
+        if policy not in SLOW_CONSUMER_POLICIES:
+            raise ValueError(f"Unknown slow-consumer policy {policy!r}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.dropped = 0
+        self._wakeup = wakeup
+        self._frames = deque()
+        self._lock = threading.Lock()
+
+    def put(self, frame, key=None) -> bool:
+        """Queue frame for sending; returns False if the client should be disconnected."""
+        with self._lock:
+            if self.policy == COALESCE and key is not None:
+                for index, (pending_key, _) in enumerate(self._frames):
+                    if pending_key == key:
+                        self._frames[index] = (key, frame)
+                        return True
+            if len(self._frames) >= self.maxsize:
+                if self.policy == DISCONNECT:
+                    return False
+                self._frames.popleft()
+                self.dropped += 1
+            self._frames.append((key, frame))
+        if self._wakeup is not None:
+            self._wakeup()
+        return True
+
+    def drain(self) -> list:
+        """Remove and return every pending frame in order."""
+        with self._lock:
+            frames = [frame for _, frame in self._frames]
+            self._frames.clear()
+        return frames
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+
+class BroadcastStats:
+    """Counters proving that fan-out hands the same buffer to every client.
+
+    ``bytes_copied`` covers both copies made to build a frame and the
+    per-recipient copies of writers that cannot send scatter-gather.
+    """
+    def __init__(self) -> None:
+        self.broadcasts = 0
+        self.deliveries = 0
+        self.bytes_fanned_out = 0
+        self.bytes_copied = 0
+        self.last_bytes_copied = 0
+        self._lock = threading.Lock()
+
+    def record(self, frame, recipients: int, copied: int = 0) -> None:
+        """Account for one broadcast of frame to recipients clients.
+
+        copied is what the writers will copy to send it; the bytes copied to
+        build the frame itself are added here.
+        """
+        copied += frame.copied
+        with self._lock:
+            self.broadcasts += 1
+            self.deliveries += recipients
+            self.bytes_fanned_out += len(frame) * recipients
+            self.bytes_copied += copied
+            self.last_bytes_copied = copied
+
+
+class ClientRegistry:
+    """Thread-safe set of connected clients with a cheap iteration snapshot."""
+    def __init__(self) -> None:
+        self._clients = set()
+        self._snapshot = ()
+        self._lock = threading.Lock()
+
+    def add(self, client) -> None:
+        with self._lock:
+            self._clients.add(client)
+            self._snapshot = tuple(self._clients)
+
+    def discard(self, client) -> bool:
+        """Remove client, returning True if it was registered."""
+        with self._lock:
+            if client not in self._clients:
+                return False
+            self._clients.discard(client)
+            self._snapshot = tuple(self._clients)
+            return True
+
+    def snapshot(self) -> tuple:
+        """Immutable view of the clients, safe to iterate while others change the registry."""
+        return self._snapshot
+
+    def __contains__(self, client) -> bool:
+        return client in self._clients
+
+    def __len__(self) -> int:
+        return len(self._snapshot)
+
+    def __iter__(self):
+        return iter(self._snapshot)
@@ -0,0 +1,118 @@
+"""Client-side cache of the SushiSocial feed.
+
+Posts are cached by id in an LRU bounded by an approximate byte budget,
+and each entry expires after a TTL. The cache also remembers the order of
+the last feed page and the ETag the API sent with it, so a refresh can be
+revalidated with If-None-Match, and it persists to disk so a cold start can
+paint the last known feed before the network answers.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_TTL = 24 * 60 * 60
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+
+class FeedCache:
+    """LRU + TTL cache of feed posts with optional JSON persistence."""
+    def __init__(self, path: str = None, ttl: float = DEFAULT_TTL,
+                 max_bytes: int = DEFAULT_MAX_BYTES, clock=time.time) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.etag = None
+        self.feed_ids = []
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, post_id):
+        """Return the cached post, or None if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(post_id)
+            if entry is None:
+                return None
+            post, size, stored_at = entry
+            if self.clock() - stored_at > self.ttl:
+                self._evict(post_id)
+                return None
+            self._entries.move_to_end(post_id)
+            return post
+
+    def put(self, post, stored_at: float = None) -> None:
+        post = list(post)
+        size = len(json.dumps(post, default=str))
+        stored_at = self.clock() if stored_at is None else stored_at
+        with self._lock:
+            if post[3] in self._entries:
+                self._evict(post[3])
+            self._entries[post[3]] = (post, size, stored_at)
+            self.size += size
+            while self.size > self.max_bytes and self._entries:
+                self._evict(next(iter(self._entries)))
+
+    def _evict(self, post_id) -> None:
+        _, size, _ = self._entries.pop(post_id)
+        self.size -= size
+
+    def store_feed(self, posts, etag=None) -> None:
+        """Cache a freshly fetched first page together with its validator."""
+        for post in posts:
+            self.put(post)
+        with self._lock:
+            self.feed_ids = [post[3] for post in posts]
+            self.etag = etag
+
+    def cached_feed(self) -> list:
+        """Posts of the last stored page that are still cached, in feed order."""
+        posts = []
+        for post_id in list(self.feed_ids):
+            post = self.get(post_id)
+            if post is not None:
+                posts.append(post)
+        return posts
+
+    def validator(self):
+        """ETag for revalidation, or None if part of the cached page has been evicted."""
+        with self._lock:
+            complete = all(post_id in self._entries for post_id in self.feed_ids)
+        return self.etag if complete else None
+
+    def save(self) -> None:
+        """Write the cache to disk atomically."""
+        if self.path is None:
+            return
+        with self._lock:
+            state = {
+                'etag': self.etag,
+                'feed_ids': self.feed_ids,
+                'entries': [[post, stored_at] for post, _, stored_at in self._entries.values()],
+            }
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, default=str)
+        os.replace(temp_path, self.path)
+
+    def load(self) -> None:
+        """Restore a previously saved cache, ignoring a missing or corrupt file."""
+        if self.path is None or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = self.clock()
+        for post, stored_at in state.get('entries', []):
+            if now - stored_at <= self.ttl:
+                self.put(post, stored_at)
+        self.feed_ids = state.get('feed_ids', [])
+        self.etag = state.get('etag')
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,141 @@
+"""Multi-process SushiServer: SO_REUSEPORT workers joined by a Unix socket bus.
+
+The parent process runs a BusHub and spawns N workers that all listen on
+the same port. When a worker receives a ``thread`` message it broadcasts it
+to its own clients and publishes the frame to the hub, which relays it to
+every other worker for local fan-out.
+"""
+
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import tempfile
+import threading
+
+from broadcast import DROP_OLDEST, ClientRegistry
+from framing import Frame, FrameDecoder, recv_frames
+from server import SushiServer, ThreadedConnection
+
+BUS_QUEUE_SIZE = 65536
+
+log = logging.getLogger('sushi.cluster')
+
+
+def check_platform():
+    if not hasattr(socket, 'SO_REUSEPORT') or not hasattr(socket, 'AF_UNIX'):
+        raise OSError("--workers requires SO_REUSEPORT and Unix domain sockets")
+
+
+class BusHub:
+    """Relays frames published by one worker to every other worker."""
+    def __init__(self, path, queue_size=BUS_QUEUE_SIZE):
+        self.path = path
+        self.queue_size = queue_size
+        self.workers = ClientRegistry()
+
+    def start(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.bind(self.path)
+        self.sock.listen()
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+
+    def close(self):
+        self.sock.close()
+        for worker in self.workers.snapshot():
+            worker.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def _accept_loop(self):
+        while True:
+            try:
+                sock, _ = self.sock.accept()
+            except OSError:
+                return
+            worker = ThreadedConnection(sock, self.path, self.queue_size, DROP_OLDEST)
+            self.workers.add(worker)
+            worker.start()
+            threading.Thread(target=self._relay, args=(worker,), daemon=True).start()
+
+    def _relay(self, source):
+        decoder = FrameDecoder()
+        try:
+            while True:
+                for payload in recv_frames(source.sock, decoder):
+                    frame = Frame(payload)
+                    for worker in self.workers.snapshot():
+                        if worker is not source:
+                            worker.send_frame(frame)
+        except OSError:
+            self.workers.discard(source)
+            source.close()
+
+
+class BusClient:
+    """Worker side of the bus: publishes local posts and delivers remote ones."""
+    def __init__(self, path, deliver, queue_size=BUS_QUEUE_SIZE):
+        self.deliver = deliver
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(path)
+        self.connection = ThreadedConnection(sock, path, queue_size, DROP_OLDEST)
+        self.connection.start()
+        threading.Thread(target=self._read_loop, daemon=True).start()
+
+    def publish(self, frame):
+        self.connection.send_frame(frame)
+
+    def _read_loop(self):
+        decoder = FrameDecoder()
+        try:
+            while True:
+                for payload in recv_frames(self.connection.sock, decoder):
+                    self.deliver(payload)
+        except OSError as e:
+            log.error("Bus connection lost: %s", e)
+            self.connection.close()
+
+
+def run_worker(options, bus_path):
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    server = SushiServer(reuse_port=True, **options)
+    server.bus = BusClient(bus_path, server.deliver_remote)
+    server.start()
+
+
+def run_workers(workers, **options):
+    """Start a bus hub and ``workers`` server processes sharing one port."""
+    check_platform()
+    if options.get('log_dir'):
+        # Each worker would number threads independently, and a reconnecting
+        # client may land on a different worker, so catch-up is single-process.
+        log.warning("Thread log and catch-up are disabled with multiple workers")
+        options['log_dir'] = None
+    bus_path = os.path.join(tempfile.gettempdir(), f"sushi-bus-{os.getpid()}.sock")
+    hub = BusHub(bus_path)
+    hub.start()
+    # Turn SIGTERM into a normal exit so the workers below are always reaped.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    metrics_port = options.get('metrics_port')
+    processes = [
+        multiprocessing.Process(target=run_worker, args=(
+            dict(options, metrics_port=metrics_port + index if metrics_port else None), bus_path,
+        ), daemon=True)
+        for index in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    log.info("Started %s workers on %s:%s", workers, options.get('host'), options.get('port'))
+    try:
+        for process in processes:
+            process.join()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        for process in processes:
+            process.terminate()
+        hub.close()
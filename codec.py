@@ -0,0 +1,261 @@
+"""Message codecs for the SushiServer socket protocol, chosen per connection.
+
+Every connection starts out speaking JSON. A client may open with
+``{"type": "hello", "codecs": [...]}`` listing the codecs it supports, most
+preferred first; the server answers ``{"type": "hello", "codec": name}`` in
+JSON and both sides switch to that codec for every later message.
+
+``sushi-bin`` is a small struct-based schema for the hot messages
+(heartbeat, heartbeat_ack, thread and blob transfers) and needs nothing
+beyond the standard library. ``msgpack`` is offered when the msgpack
+package is installed. Either way image bytes travel raw instead of as
+base64 text. Whatever the codec, decoded messages carry raw ``bytes`` in
+the fields listed in BINARY_FIELDS, so handlers do not care which one a
+client picked.
+"""
+
+import base64
+import json
+import struct
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+from framing import MAX_FRAME_SIZE, Frame
+
+# Fields that hold raw bytes once decoded; JSON carries them as base64 text.
+BINARY_FIELDS = {
+    'thread': ('image',),
+    'blob_put': ('data',),
+    'blob': ('data',),
+}
+
+
+class CodecError(ValueError):
+    """Raised when a payload cannot be decoded into a message."""
+
+
+class JsonCodec:
+    """The original text protocol, kept as the fallback every client speaks."""
+    name = 'json'
+
+    def encode(self, message: dict) -> bytes:
+        fields = BINARY_FIELDS.get(message.get('type'), ())
+        if any(isinstance(message.get(field), (bytes, bytearray)) for field in fields):
+            message = dict(message)
+            for field in fields:
+                if isinstance(message.get(field), (bytes, bytearray)):
+                    message[field] = base64.b64encode(message[field]).decode('ascii')
+        return json.dumps(message, separators=(',', ':')).encode()
+
+    def decode(self, payload) -> dict:
+        message = json.loads(payload)
+        if not isinstance(message, dict):
+            raise CodecError("Message is not a JSON object")
+        for field in BINARY_FIELDS.get(message.get('type'), ()):
+            if isinstance(message.get(field), str):
+                message[field] = base64.b64decode(message[field])
+        return message
+
+
+class MsgpackCodec:
+    """msgpack with bin types, so bytes fields round-trip without base64."""
+    name = 'msgpack'
+
+    def encode(self, message: dict) -> bytes:
+        return msgpack.packb(message, use_bin_type=True)
+
+    def decode(self, payload) -> dict:
+        message = msgpack.unpackb(payload, raw=False)
+        if not isinstance(message, dict):
+            raise CodecError("Message is not a msgpack map")
+        return message
+
+
+GENERIC = 0
+HEARTBEAT = 1
+HEARTBEAT_ACK = 2
+THREAD = 3
+BLOB_PUT = 4
+BLOB = 5
+
+HAS_SEQ = 1
+HAS_IMAGE = 2
+HAS_IMAGE_HASH = 4
+
+TAG = struct.Struct('!B')
+HEARTBEAT_ACK_STRUCT = struct.Struct('!Bdd')
+THREAD_HEAD = struct.Struct('!BBQII')
+LENGTH = struct.Struct('!I')
+BLOB_HEAD = struct.Struct('!B32sQQ')
+
+
+def is_hash(value) -> bool:
+    return isinstance(value, str) and len(value) == 64 and all(c in '0123456789abcdef' for c in value)
+
+
+class StructCodec:
+    """Fixed binary layouts for the hot message types, JSON for the rest.
+
+    Each payload starts with a one-byte tag. Threads are a header with
+    flags, seq and string lengths, followed by author, content, the raw
+    image, the 32-byte image hash and a JSON object of any other fields.
+    A message that does not fit its layout, or has no layout at all, is
+    sent as tag 0 followed by its JSON encoding, so nothing is lost.
+    """
+    name = 'sushi-bin'
+
+    def __init__(self) -> None:
+        self.json = JsonCodec()
+
+    def encode(self, message: dict) -> bytes:
+        kind = message.get('type')
+        if kind == 'heartbeat' and len(message) == 1:
+            return TAG.pack(HEARTBEAT)
+        if kind == 'heartbeat_ack' and message.keys() == {'type', 'interval', 'timeout'}:
+            return HEARTBEAT_ACK_STRUCT.pack(HEARTBEAT_ACK, message['interval'], message['timeout'])
+        if kind == 'thread':
+            payload = self._encode_thread(message)
+            if payload is not None:
+                return payload
+        if (kind == 'blob_put' and message.keys() == {'type', 'data'}
+                and isinstance(message['data'], bytes)):
+            return TAG.pack(BLOB_PUT) + message['data']
+        if (kind == 'blob' and message.keys() == {'type', 'hash', 'offset', 'size', 'data'}
+                and is_hash(message['hash']) and isinstance(message['data'], bytes)):
+            return BLOB_HEAD.pack(BLOB, bytes.fromhex(message['hash']),
+                                  message['offset'], message['size']) + message['data']
+        return TAG.pack(GENERIC) + self.json.encode(message)
+
+    def _encode_thread(self, message: dict):
+        author = message.get('author')
+        content = message.get('content')
+        if not isinstance(author, str) or not isinstance(content, str):
+            return None
+        flags = 0
+        seq = message.get('seq')
+        image = message.get('image')
+        image_hash = message.get('image_hash')
+        extras = {key: value for key, value in message.items()
+                  if key not in ('type', 'author', 'content', 'seq', 'image', 'image_hash')}
+        if isinstance(seq, int) and seq >= 0:
+            flags |= HAS_SEQ
+        elif 'seq' in message:
+            extras['seq'] = seq
+        if isinstance(image, bytes):
+            flags |= HAS_IMAGE
+        elif 'image' in message:
+            extras['image'] = image
+        if is_hash(image_hash):
+            flags |= HAS_IMAGE_HASH
+        elif 'image_hash' in message:
+            extras['image_hash'] = image_hash
+        author = author.encode()
+        content = content.encode()
+        parts = [THREAD_HEAD.pack(THREAD, flags, seq if flags & HAS_SEQ else 0,
+                                  len(author), len(content)), author, content]
+        if flags & HAS_IMAGE:
+            parts += [LENGTH.pack(len(image)), image]
+        if flags & HAS_IMAGE_HASH:
+            parts.append(bytes.fromhex(image_hash))
+        if extras:
+            parts.append(json.dumps(extras, separators=(',', ':')).encode())
+        return b''.join(parts)
+
+    def decode(self, payload) -> dict:
+        view = memoryview(payload)
+        if not view:
+            raise CodecError("Empty message")
+        try:
+            tag = view[0]
+            if tag == HEARTBEAT:
+                return {'type': 'heartbeat'}
+            if tag == HEARTBEAT_ACK:
+                _, interval, timeout = HEARTBEAT_ACK_STRUCT.unpack_from(view)
+                return {'type': 'heartbeat_ack', 'interval': interval, 'timeout': timeout}
+            if tag == THREAD:
+                return self._decode_thread(view)
+            if tag == BLOB_PUT:
+                return {'type': 'blob_put', 'data': bytes(view[TAG.size:])}
+            if tag == BLOB:
+                _, digest, offset, size = BLOB_HEAD.unpack_from(view)
+                return {'type': 'blob', 'hash': digest.hex(), 'offset': offset, 'size': size,
+                        'data': bytes(view[BLOB_HEAD.size:])}
+            if tag == GENERIC:
+                return self.json.decode(bytes(view[TAG.size:]))
+        except (struct.error, UnicodeDecodeError) as e:
+            raise CodecError(f"Malformed sushi-bin message: {e}") from None
+        raise CodecError(f"Unknown sushi-bin tag {tag}")
+
+    def _decode_thread(self, view) -> dict:
+        _, flags, seq, author_length, content_length = THREAD_HEAD.unpack_from(view)
+        offset = THREAD_HEAD.size
+        author = str(view[offset:offset + author_length], 'utf-8')
+        offset += author_length
+        content = str(view[offset:offset + content_length], 'utf-8')
+        offset += content_length
+        message = {'type': 'thread', 'author': author, 'content': content}
+        if flags & HAS_SEQ:
+            message['seq'] = seq
+        if flags & HAS_IMAGE:
+            (length,) = LENGTH.unpack_from(view, offset)
+            offset += LENGTH.size
+            message['image'] = bytes(view[offset:offset + length])
+            offset += length
+        if flags & HAS_IMAGE_HASH:
+            message['image_hash'] = bytes(view[offset:offset + 32]).hex()
+            offset += 32
+        if offset > len(view):
+            raise struct.error("thread message is truncated")
+        if offset < len(view):
+            message.update(json.loads(bytes(view[offset:])))
+        return message
+
+
+JSON = JsonCodec()
+CODECS = {codec.name: codec for codec in (
+    StructCodec(),
+    *((MsgpackCodec(),) if msgpack is not None else ()),
+    JSON,
+)}
+
+
+def negotiate(offered) -> JsonCodec:
+    """Return the first offered codec this side supports, falling back to JSON."""
+    for name in offered or ():
+        if name in CODECS:
+            return CODECS[name]
+    return JSON
+
+
+class MessageFrames:
+    """One outgoing message, encoded at most once per codec in use.
+
+    Broadcasts hand every recipient ``frame(client.codec)``, so a fan-out
+    to clients on three codecs costs three encodes no matter how many
+    clients there are. Frames already encoded elsewhere (the thread log's
+    JSON, or a payload relayed by another worker) can be passed in as
+    ``payloads`` keyed by codec name so they are reused, not re-encoded.
+    """
+    def __init__(self, message: dict = None, payloads: dict = None,
+                 max_frame_size: int = MAX_FRAME_SIZE) -> None:
+        self.max_frame_size = max_frame_size
+        self._message = message
+        self._frames = {name: Frame(payload, max_frame_size)
+                        for name, payload in (payloads or {}).items()}
+
+    @property
+    def message(self) -> dict:
+        if self._message is None:
+            name, frame = next(iter(self._frames.items()))
+            self._message = CODECS[name].decode(frame.payload)
+        return self._message
+
+    def frame(self, codec) -> Frame:
+        frame = self._frames.get(codec.name)
+        if frame is None:
+            frame = Frame(codec.encode(self.message), self.max_frame_size)
+            self._frames[codec.name] = frame
+        return frame
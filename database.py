@@ -0,0 +1,79 @@
+"""Shared SQLite data-access layer for SushiSocial.
+
+Connections are opened once per thread and kept for the life of the
+application in WAL mode, so readers never block the writer and a feed
+refresh does not pay a connect/close cycle per query. Statements are
+reused through sqlite3's per-connection prepared statement cache, which is
+keyed by SQL text; callers should pass constant SQL strings with
+parameters rather than formatting values into the query.
+"""
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+    # REPLACE only fires delete triggers with recursive triggers enabled,
+    # which the post_stats counters rely on.
+    "PRAGMA recursive_triggers=ON",
+)
+
+
+class Database:
+    """Owns one persistent, tuned connection per thread for a database file."""
+    def __init__(self, path: str, cached_statements: int = 256) -> None:
+        self.path = path
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening and tuning it on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.path,
+                detect_types=sqlite3.PARSE_DECLTYPES,
+                cached_statements=self.cached_statements,
+                check_same_thread=False,
+            )
+            for pragma in PRAGMAS:
+                conn.execute(pragma)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def execute(self, sql: str, params=()) -> sqlite3.Cursor:
+        return self.connection().execute(sql, params)
+
+    def fetchone(self, sql: str, params=()):
+        return self.execute(sql, params).fetchone()
+
+    def fetchall(self, sql: str, params=()) -> list:
+        return self.execute(sql, params).fetchall()
+
+    def fetchvalue(self, sql: str, params=(), default=None):
+        """Return the first column of the first row, or default if there is none."""
+        row = self.fetchone(sql, params)
+        return default if row is None else row[0]
+
+    @contextmanager
+    def transaction(self):
+        """Run a block of statements in one transaction, rolling back on error."""
+        conn = self.connection()
+        with conn:
+            yield conn
+
+    def close(self) -> None:
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
@@ -0,0 +1,317 @@
+"""Virtualized model/view rendering of the SushiSocial feed.
+
+Posts live in a FeedModel and are drawn by PostDelegate, which paints only
+the rows that are visible and hit-tests clicks itself. Nothing in the feed
+is a widget, so memory and repaint cost no longer grow with the number of
+posts, comments or buttons on screen.
+"""
+
+from PyQt6.QtCore import QAbstractListModel, QEvent, QModelIndex, QRect, QSize, Qt, pyqtSignal
+from PyQt6.QtGui import QColor, QFont, QFontMetrics, QPainter
+from PyQt6.QtWidgets import QAbstractItemView, QListView, QStyledItemDelegate
+
+from repository import post_cursor
+
+POST_ROLE = Qt.ItemDataRole.UserRole + 1
+
+MARGIN = 5
+PADDING = 10
+SPACING = 8
+STAR_SIZE = 30
+BUTTON_WIDTH = 90
+BUTTON_HEIGHT = 30
+WRAP = Qt.AlignmentFlag.AlignLeft.value | Qt.TextFlag.TextWordWrap.value
+CENTER = Qt.AlignmentFlag.AlignCenter.value
+LEFT = Qt.AlignmentFlag.AlignLeft.value | Qt.AlignmentFlag.AlignVCenter.value
+
+
+class FeedItem:
+    """One post row from the posts API together with its PostStats."""
+    def __init__(self, post, stats) -> None:
+        self.post = post
+        self.stats = stats
+
+    @property
+    def post_id(self) -> int:
+        return self.post[3]
+
+    @property
+    def title(self) -> str:
+        return self.post[0]
+
+    @property
+    def content(self) -> str:
+        return self.post[1]
+
+    @property
+    def cursor(self) -> tuple:
+        """(timestamp, id) keyset cursor for loading the posts after this one."""
+        return post_cursor(self.post)
+
+
+class FeedModel(QAbstractListModel):
+    """List model of FeedItems exposed through POST_ROLE.
+
+    Besides full resets, the model can patch a single post in place or
+    prepend newly fetched posts, so user actions only touch the rows they
+    affect. ``row_resized`` fires when a change alters a row's height.
+    """
+    row_resized = pyqtSignal(QModelIndex)
+
+    def __init__(self, parent=None) -> None:
+        super().__init__(parent)
+        self._items = []
+        self._rows = {}
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._items)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        item = self._items[index.row()]
+        if role == POST_ROLE:
+            return item
+        if role == Qt.ItemDataRole.DisplayRole:
+            return item.title
+        return None
+
+    def set_posts(self, posts, stats) -> None:
+        """Replace the whole feed; stats maps post id to PostStats."""
+        self.beginResetModel()
+        self._items = [FeedItem(post, stats[post[3]]) for post in posts]
+        self._reindex()
+        self.endResetModel()
+
+    def merge_posts(self, posts, stats) -> None:
+        """Update posts already in the feed and prepend the ones that are new."""
+        fresh = []
+        for post in posts:
+            row = self._rows.get(post[3])
+            if row is None:
+                fresh.append(FeedItem(post, stats[post[3]]))
+            else:
+                self._items[row].post = post
+                self.update_stats(post[3], stats[post[3]])
+        if fresh:
+            self.beginInsertRows(QModelIndex(), 0, len(fresh) - 1)
+            self._items[:0] = fresh
+            self._reindex()
+            self.endInsertRows()
+
+    def append_posts(self, posts, stats) -> None:
+        """Add an older page of posts to the end of the feed."""
+        fresh = [FeedItem(post, stats[post[3]]) for post in posts if post[3] not in self._rows]
+        if not fresh:
+            return
+        first = len(self._items)
+        self.beginInsertRows(QModelIndex(), first, first + len(fresh) - 1)
+        for row, item in enumerate(fresh, start=first):
+            self._items.append(item)
+            self._rows[item.post_id] = row
+        self.endInsertRows()
+
+    def last_cursor(self):
+        """Keyset cursor of the oldest post loaded so far."""
+        return self._items[-1].cursor if self._items else None
+
+    def stats(self, post_id: int):
+        """Stats currently shown for post_id, or None if it is not loaded."""
+        row = self._rows.get(post_id)
+        return None if row is None else self._items[row].stats
+
+    def update_stats(self, post_id: int, stats) -> None:
+        """Swap in fresh stats for one post and repaint only its row."""
+        row = self._rows.get(post_id)
+        if row is None:
+            return
+        item = self._items[row]
+        resized = len(item.stats.comments) != len(stats.comments)
+        item.stats = stats
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+        if resized:
+            self.row_resized.emit(index)
+
+    def last_post_id(self):
+        """Highest post id in the feed, used for delta fetches."""
+        return max(self._rows, default=None)
+
+    def _reindex(self) -> None:
+        self._rows = {item.post_id: row for row, item in enumerate(self._items)}
+
+
+class PostLayout:
+    """Geometry of one painted post, shared by painting, sizing and hit-testing."""
+    def __init__(self, rect: QRect, item: FeedItem, font: QFont) -> None:
+        self.title_font = QFont(font)
+        self.title_font.setPixelSize(16)
+        self.title_font.setBold(True)
+        metrics = QFontMetrics(font)
+        title_metrics = QFontMetrics(self.title_font)
+
+        self.card = rect.adjusted(MARGIN, MARGIN, -MARGIN, -MARGIN)
+        x = self.card.left() + PADDING
+        y = self.card.top() + PADDING
+        width = max(self.card.width() - 2 * PADDING, 1)
+
+        self.title = QRect(x, y, width, title_metrics.height())
+        y += self.title.height() + SPACING
+
+        self.stars = [
+            QRect(x + i * (STAR_SIZE + 4), y, STAR_SIZE, STAR_SIZE) for i in range(5)
+        ]
+        self.rating = QRect(self.stars[-1].right() + SPACING, y, width, STAR_SIZE)
+        y += STAR_SIZE + SPACING
+
+        content_height = metrics.boundingRect(QRect(0, 0, width, 0), WRAP, item.content).height()
+        self.content = QRect(x, y, width, content_height)
+        y += content_height + SPACING
+
+        self.like = QRect(x, y, BUTTON_WIDTH, BUTTON_HEIGHT)
+        self.dislike = QRect(self.like.right() + SPACING, y, BUTTON_WIDTH, BUTTON_HEIGHT)
+        self.comment = QRect(self.dislike.right() + SPACING, y, BUTTON_WIDTH, BUTTON_HEIGHT)
+        y += BUTTON_HEIGHT + SPACING
+
+        self.comments = []
+        for _ in item.stats.comments:
+            self.comments.append(QRect(x, y, width, metrics.height()))
+            y += metrics.height()
+
+        self.height = y - rect.top() + PADDING + MARGIN
+
+    def hit(self, pos):
+        """Return ('star', rating), ('like', True/False), ('comment', None) or None."""
+        for rating, star in enumerate(self.stars, start=1):
+            if star.contains(pos):
+                return 'star', rating
+        if self.like.contains(pos):
+            return 'like', True
+        if self.dislike.contains(pos):
+            return 'like', False
+        if self.comment.contains(pos):
+            return 'comment', None
+        return None
+
+
+class PostDelegate(QStyledItemDelegate):
+    """Paints posts and turns clicks on their controls into signals."""
+    rate_requested = pyqtSignal(int, int)
+    reaction_requested = pyqtSignal(int, bool)
+    comment_requested = pyqtSignal(int)
+
+    def __init__(self, colors: dict, view: QListView) -> None:
+        super().__init__(view)
+        self.colors = colors
+        self.view = view
+
+    def _layout(self, option, index) -> PostLayout:
+        rect = QRect(option.rect)
+        if rect.width() <= 0:
+            rect.setWidth(self.view.viewport().width())
+        return PostLayout(rect, index.data(POST_ROLE), option.font)
+
+    def sizeHint(self, option, index) -> QSize:
+        layout = self._layout(option, index)
+        return QSize(self.view.viewport().width(), layout.height)
+
+    def paint(self, painter, option, index) -> None:
+        item = index.data(POST_ROLE)
+        layout = self._layout(option, index)
+        stats = item.stats
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(QColor(self.colors['light_gray']))
+        painter.drawRoundedRect(layout.card, 10, 10)
+
+        text = QColor(self.colors['text_primary'])
+        muted = QColor(self.colors['text_secondary'])
+        painter.setPen(text)
+        painter.setFont(layout.title_font)
+        painter.drawText(layout.title, LEFT, item.title)
+        painter.setFont(option.font)
+
+        filled = round(stats.average_rating or 0)
+        for rating, star in enumerate(layout.stars, start=1):
+            painter.setPen(QColor("#f2c94c") if rating <= filled else muted)
+            painter.drawText(star, CENTER, "★")
+        if stats.rating_count:
+            painter.setPen(muted)
+            painter.drawText(layout.rating, LEFT,
+                             f"{stats.average_rating:.1f} ({stats.rating_count})")
+
+        painter.setPen(text)
+        painter.drawText(layout.content, WRAP, item.content)
+
+        buttons = (
+            (layout.like, f"👍 {stats.likes}"),
+            (layout.dislike, f"👎 {stats.dislikes}"),
+            (layout.comment, "Comment"),
+        )
+        for rect, label in buttons:
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(QColor(self.colors['border']))
+            painter.drawRoundedRect(rect, 5, 5)
+            painter.setPen(text)
+            painter.drawText(rect, CENTER, label)
+
+        painter.setPen(muted)
+        metrics = QFontMetrics(option.font)
+        for rect, (content, username) in zip(layout.comments, stats.comments):
+            line = metrics.elidedText(f"{username}: {content}", Qt.TextElideMode.ElideRight,
+                                      rect.width())
+            painter.drawText(rect, LEFT, line)
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index) -> bool:
+        if (event.type() != QEvent.Type.MouseButtonRelease
+                or event.button() != Qt.MouseButton.LeftButton):
+            return super().editorEvent(event, model, option, index)
+        hit = self._layout(option, index).hit(event.position().toPoint())
+        if hit is None:
+            return False
+        post_id = index.data(POST_ROLE).post_id
+        kind, value = hit
+        if kind == 'star':
+            self.rate_requested.emit(post_id, value)
+        elif kind == 'like':
+            self.reaction_requested.emit(post_id, value)
+        else:
+            self.comment_requested.emit(post_id)
+        return True
+
+
+class FeedView(QListView):
+    """QListView configured for smooth scrolling over variable-height posts.
+
+    ``near_bottom`` is emitted when the user scrolls within
+    ``prefetch_distance`` pixels of the end, so the next page can be loaded
+    before it is needed.
+    """
+    near_bottom = pyqtSignal()
+
+    def __init__(self, colors: dict, parent=None, prefetch_distance: int = 1500) -> None:
+        super().__init__(parent)
+        self.delegate = PostDelegate(colors, self)
+        self.setItemDelegate(self.delegate)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.setResizeMode(QListView.ResizeMode.Adjust)
+        self.setLayoutMode(QListView.LayoutMode.Batched)
+        self.setBatchSize(50)
+        self.setSpacing(2)
+        self.prefetch_distance = prefetch_distance
+        self.verticalScrollBar().valueChanged.connect(self._check_prefetch)
+        self.verticalScrollBar().rangeChanged.connect(self._check_prefetch)
+
+    def _check_prefetch(self, *_) -> None:
+        bar = self.verticalScrollBar()
+        if bar.maximum() - bar.value() <= self.prefetch_distance:
+            self.near_bottom.emit()
+
+    def setModel(self, model) -> None:
+        super().setModel(model)
+        if isinstance(model, FeedModel):
+            model.row_resized.connect(self.delegate.sizeHintChanged)
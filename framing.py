@@ -0,0 +1,159 @@
+"""Length-prefixed framing for the SushiServer socket protocol.
+
+Every message on the wire is a 4-byte big-endian payload length followed by
+the payload itself. The server and clients share this module so that large
+posts can arrive over many reads and bursts of small messages can be split
+out of a single read.
+"""
+
+import itertools
+import struct
+from collections import deque
+
+HEADER = struct.Struct('!I')
+HEADER_SIZE = HEADER.size
+MAX_FRAME_SIZE = 16 * 1024 * 1024
+READ_SIZE = 64 * 1024
+IOV_MAX = 512
+
+
+class FrameTooLarge(ValueError):
+    """Raised when a peer announces a frame above the configured limit."""
+
+
+def encode_frame(payload: bytes, max_frame_size: int = MAX_FRAME_SIZE) -> bytes:
+    """Prefix payload with its length, ready to be written to a socket."""
+    if len(payload) > max_frame_size:
+        raise FrameTooLarge(f"Frame of {len(payload)} bytes exceeds limit of {max_frame_size}")
+    return HEADER.pack(len(payload)) + payload
+
+
+class Frame:
+    """Immutable, pre-encoded frame kept as separate header and payload buffers.
+
+    The same Frame is handed to every recipient of a broadcast; writers send
+    ``buffers`` with scatter-gather I/O so the payload is never joined to its
+    header or copied per socket. ``copied`` records the bytes that had to be
+    copied to build it (zero when the payload is already ``bytes``).
+    """
+    __slots__ = ('header', 'payload', 'copied')
+
+    def __init__(self, payload, max_frame_size: int = MAX_FRAME_SIZE) -> None:
+        copied = 0
+        if not isinstance(payload, bytes):
+            payload = bytes(payload)
+            copied = len(payload)
+        if len(payload) > max_frame_size:
+            raise FrameTooLarge(f"Frame of {len(payload)} bytes exceeds limit of {max_frame_size}")
+        self.header = HEADER.pack(len(payload))
+        self.payload = payload
+        self.copied = copied
+
+    @property
+    def buffers(self) -> tuple:
+        return (self.header, self.payload)
+
+    def __len__(self) -> int:
+        return HEADER_SIZE + len(self.payload)
+
+    def __bytes__(self) -> bytes:
+        return self.header + self.payload
+
+
+class FrameBatch:
+    """Several already length-prefixed frames queued and written as one unit.
+
+    ``buffers`` are raw wire bytes, for example a range read straight out of
+    the thread log, so a long catch-up takes one outbound queue slot and one
+    scatter-gather write instead of one of each per message.
+    """
+    __slots__ = ('buffers', 'copied', '_size')
+
+    def __init__(self, buffers, copied: int = 0) -> None:
+        self.buffers = tuple(buffers)
+        self.copied = copied
+        self._size = sum(len(buffer) for buffer in self.buffers)
+
+    def __len__(self) -> int:
+        return self._size
+
+
+class FrameDecoder:
+    """Incremental decoder that turns arbitrary chunks of bytes into frames."""
+    def __init__(self, max_frame_size: int = MAX_FRAME_SIZE) -> None:
+        self.max_frame_size = max_frame_size
+        self._buffer = bytearray()
+        self._expected = None
+
+    def feed(self, data: bytes) -> list:
+        """Buffer data and return every frame that is now complete."""
+        buffer = self._buffer
+        buffer += data
+        frames = []
+        offset = 0
+        while True:
+            if self._expected is None:
+                if len(buffer) - offset < HEADER_SIZE:
+                    break
+                (length,) = HEADER.unpack_from(buffer, offset)
+                if length > self.max_frame_size:
+                    raise FrameTooLarge(
+                        f"Peer announced {length} byte frame, limit is {self.max_frame_size}"
+                    )
+                self._expected = length
+                offset += HEADER_SIZE
+            end = offset + self._expected
+            if end > len(buffer):
+                break
+            frames.append(bytes(buffer[offset:end]))
+            offset = end
+            self._expected = None
+        if offset:
+            del buffer[:offset]
+        return frames
+
+    @property
+    def pending(self) -> int:
+        """Number of buffered bytes not yet returned as a frame."""
+        return len(self._buffer)
+
+
+def send_buffers(sock, buffers) -> int:
+    """Write every buffer to a blocking socket using scatter-gather sendmsg.
+
+    Partial writes are resumed through memoryview slices, so nothing is
+    copied. Returns the number of bytes that had to be copied, which is only
+    non-zero on platforms without ``sendmsg`` where the buffers are joined.
+    """
+    if not hasattr(sock, 'sendmsg'):
+        data = b''.join(buffers)
+        sock.sendall(data)
+        return len(data)
+    pending = deque(memoryview(buffer) for buffer in buffers if len(buffer))
+    while pending:
+        sent = sock.sendmsg(list(itertools.islice(pending, IOV_MAX)))
+        while sent:
+            head = pending[0]
+            if sent >= len(head):
+                sent -= len(head)
+                pending.popleft()
+            else:
+                pending[0] = head[sent:]
+                sent = 0
+    return 0
+
+
+def recv_frames(sock, decoder: FrameDecoder) -> list:
+    """Read once from a blocking socket and return the frames completed by it."""
+    data = sock.recv(READ_SIZE)
+    if not data:
+        raise ConnectionError("Connection closed by peer")
+    return decoder.feed(data)
+
+
+async def read_frames(reader, decoder: FrameDecoder) -> list:
+    """Asyncio counterpart of recv_frames for a StreamReader."""
+    data = await reader.read(READ_SIZE)
+    if not data:
+        raise ConnectionError("Connection closed by peer")
+    return decoder.feed(data)
@@ -0,0 +1,121 @@
+"""Thumbnail pipeline for avatars and post images.
+
+Images are decoded and downscaled on the background thread pool with
+QImageReader.setScaledSize, so the full-size bitmap never exists and the
+GUI thread only converts the small result to a QPixmap. Thumbnails are
+kept in an in-memory LRU bounded by bytes and on disk under the SHA-256 of
+the source bytes, so the same picture is only decoded once no matter how
+many posts or profiles show it.
+"""
+
+import hashlib
+import os
+from collections import OrderedDict
+
+from PyQt6.QtCore import QBuffer, QByteArray, QIODevice, QSize, Qt
+from PyQt6.QtGui import QImage, QImageReader, QPixmap
+
+DEFAULT_MEMORY_BYTES = 64 * 1024 * 1024
+
+
+class PixmapLRU:
+    """GUI-thread LRU of QPixmaps bounded by their approximate size in bytes."""
+    def __init__(self, max_bytes: int = DEFAULT_MEMORY_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        pixmap = self._entries.get(key)
+        if pixmap is not None:
+            self._entries.move_to_end(key)
+        return pixmap
+
+    def put(self, key, pixmap: QPixmap) -> None:
+        if key in self._entries:
+            self.size -= pixmap_bytes(self._entries.pop(key))
+        self._entries[key] = pixmap
+        self.size += pixmap_bytes(pixmap)
+        while self.size > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= pixmap_bytes(evicted)
+
+
+def pixmap_bytes(pixmap: QPixmap) -> int:
+    return pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
+
+
+class ImagePipeline:
+    """Loads thumbnails off the GUI thread and hands back QPixmaps.
+
+    ``source`` is either a file path or the raw image bytes. Requests for a
+    thumbnail that is already being decoded are coalesced.
+    """
+    def __init__(self, runner, cache_dir: str = "thumbnails",
+                 max_bytes: int = DEFAULT_MEMORY_BYTES) -> None:
+        self.runner = runner
+        self.cache_dir = cache_dir
+        self.memory = PixmapLRU(max_bytes)
+        self._waiting = {}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def thumbnail(self, source, size: QSize, on_ready) -> None:
+        """Call on_ready(QPixmap) with source scaled to fit size."""
+        key = self._key(source, size)
+        pixmap = self.memory.get(key)
+        if pixmap is not None:
+            on_ready(pixmap)
+            return
+        if key in self._waiting:
+            self._waiting[key].append(on_ready)
+            return
+        self._waiting[key] = [on_ready]
+        self.runner.submit(
+            self._load, source, QSize(size),
+            on_done=lambda image: self._deliver(key, image),
+            on_error=lambda _: self._waiting.pop(key, None)
+        )
+
+    def _key(self, source, size: QSize) -> tuple:
+        if isinstance(source, (bytes, bytearray)):
+            identity = hashlib.sha256(source).hexdigest()
+        else:
+            stat = os.stat(source)
+            identity = (source, stat.st_mtime_ns, stat.st_size)
+        return identity, size.width(), size.height()
+
+    def _deliver(self, key, image: QImage) -> None:
+        pixmap = QPixmap.fromImage(image)
+        self.memory.put(key, pixmap)
+        for on_ready in self._waiting.pop(key, []):
+            on_ready(pixmap)
+
+    def _load(self, source, size: QSize) -> QImage:
+        """Worker thread: return the thumbnail from disk cache or decode it."""
+        if isinstance(source, (bytes, bytearray)):
+            data = bytes(source)
+        else:
+            with open(source, 'rb') as f:
+                data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        disk_path = os.path.join(self.cache_dir, f"{digest}-{size.width()}x{size.height()}.png")
+        image = QImage()
+        if os.path.exists(disk_path) and image.load(disk_path):
+            return image
+
+        buffer = QBuffer()
+        buffer.setData(QByteArray(data))
+        buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+        reader = QImageReader(buffer)
+        reader.setAutoTransform(True)
+        original = reader.size()
+        if original.isValid():
+            reader.setScaledSize(original.scaled(size, Qt.AspectRatioMode.KeepAspectRatio))
+        image = reader.read()
+        if image.isNull():
+            raise ValueError(f"Cannot decode image: {reader.errorString()}")
+
+        temp_path = f"{disk_path}.{os.getpid()}.tmp"
+        if image.save(temp_path, "PNG"):
+            os.replace(temp_path, disk_path)
+        return image
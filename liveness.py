@@ -0,0 +1,74 @@
+"""Connection liveness tracking for SushiServer.
+
+Clients are kept in a hashed timing wheel keyed by the tick in which they
+expire. Reaping only visits the slots whose time has passed, so its cost is
+proportional to the number of expired clients rather than to every client.
+"""
+
+import math
+import threading
+import time
+
+
+class TimerWheel:
+    """Hashed timing wheel holding one deadline per client.
+
+    Every deadline is ``timeout`` seconds after the client was last seen and
+    the wheel spans more than ``timeout``, so as long as ``expire`` runs every
+    tick a slot only holds clients whose deadline falls in that exact tick.
+    Deadlines are still checked while reaping so a late reaper stays correct.
+    """
+    def __init__(self, timeout: float, tick: float = 1.0, clock=time.monotonic) -> None:
+        self.timeout = timeout
+        self.tick = tick
+        self.clock = clock
+        self._slots = [set() for _ in range(math.ceil(timeout / tick) + 2)]
+        self._deadline_of = {}
+        self._cursor = self._tick_of(clock())
+        self._lock = threading.Lock()
+
+    def _tick_of(self, when: float) -> int:
+        return int(when // self.tick)
+
+    def touch(self, client, now: float = None) -> None:
+        """Record activity from client, pushing its deadline forward."""
+        now = self.clock() if now is None else now
+        deadline = self._tick_of(now + self.timeout) + 1
+        with self._lock:
+            previous = self._deadline_of.get(client)
+            if previous == deadline:
+                return
+            if previous is not None:
+                self._slots[previous % len(self._slots)].discard(client)
+            self._slots[deadline % len(self._slots)].add(client)
+            self._deadline_of[client] = deadline
+
+    def remove(self, client) -> None:
+        with self._lock:
+            deadline = self._deadline_of.pop(client, None)
+            if deadline is not None:
+                self._slots[deadline % len(self._slots)].discard(client)
+
+    def expire(self, now: float = None) -> list:
+        """Remove and return every client whose deadline has passed."""
+        now = self.clock() if now is None else now
+        current = self._tick_of(now)
+        expired = []
+        with self._lock:
+            # A full rotation visits every slot; never walk further than that.
+            self._cursor = max(self._cursor, current - len(self._slots) + 1)
+            while self._cursor <= current:
+                slot = self._slots[self._cursor % len(self._slots)]
+                due = [client for client in slot if self._deadline_of[client] <= current]
+                for client in due:
+                    slot.discard(client)
+                    del self._deadline_of[client]
+                expired.extend(due)
+                self._cursor += 1
+        return expired
+
+    def __contains__(self, client) -> bool:
+        return client in self._deadline_of
+
+    def __len__(self) -> int:
+        return len(self._deadline_of)
@@ -0,0 +1,264 @@
+"""Low-overhead server instrumentation exposed in the Prometheus text format.
+
+Counters and histograms are plain in-process objects whose update is a
+lock and an addition, so they can sit on the per-message hot path;
+gauges are read from a callback when scraped. A Registry renders them on
+demand, and MetricsServer answers scrapes on a local port from a
+background thread. Rates such as messages per second are left to the
+scraper (``rate(sushi_messages_received_total[1m])``).
+
+The module also provides RateLimitFilter, so a log line emitted per
+message cannot flood the output or slow the server under load.
+"""
+
+import abc
+import bisect
+import logging
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+LATENCY_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+)
+
+
+def format_value(value) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def format_labels(names, values, extra=()) -> str:
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+               for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+class Metric(abc.ABC):
+    """Base for a named metric family rendered as one or more series."""
+    kind = 'untyped'
+    label_names = ()
+
+    def __init__(self, name: str, help: str) -> None:
+        self.name = name
+        self.help = help
+
+    def _series(self):
+        return [((), self)]
+
+    @abc.abstractmethod
+    def _samples(self, name, label_names, values) -> list:
+        """Return the sample lines of one series."""
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in self._series():
+            lines.extend(child._samples(self.name, self.label_names, values))
+        return lines
+
+
+class LabeledMetric(Metric):
+    """Metric updated in process, optionally split by label values."""
+    def __init__(self, name: str, help: str, labels=()) -> None:
+        super().__init__(name, help)
+        self.label_names = tuple(labels)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """Return the child metric for one combination of label values."""
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._child())
+        return child
+
+    @abc.abstractmethod
+    def _child(self):
+        """Return a new unlabeled metric configured like this one."""
+
+    def _series(self):
+        if self.label_names:
+            return sorted(self._children.items())
+        return super()._series()
+
+
+class Counter(LabeledMetric):
+    """Monotonically increasing total, or one read from a callback at scrape time."""
+    kind = 'counter'
+
+    def __init__(self, name: str, help: str, labels=(), function=None) -> None:
+        super().__init__(name, help, labels)
+        self.value = 0
+        self.function = function
+
+    def _child(self):
+        return Counter(self.name, self.help)
+
+    def inc(self, amount=1) -> None:
+        with self._lock:
+            self.value += amount
+
+    def _samples(self, name, label_names, values):
+        value = self.function() if self.function is not None else self.value
+        return [f"{name}{format_labels(label_names, values)} {format_value(value)}"]
+
+
+class Gauge(Metric):
+    """Current value, read from a callback at scrape time."""
+    kind = 'gauge'
+
+    def __init__(self, name: str, help: str, function) -> None:
+        super().__init__(name, help)
+        self.function = function
+
+    def _samples(self, name, label_names, values):
+        return [f"{name}{format_labels(label_names, values)} {format_value(self.function())}"]
+
+
+class Histogram(LabeledMetric):
+    """Distribution of observations over fixed upper bounds."""
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, labels=(), buckets=LATENCY_BUCKETS) -> None:
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def _child(self):
+        return Histogram(self.name, self.help, buckets=self.buckets)
+
+    def observe(self, value) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def _samples(self, name, label_names, values):
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self.sum, self.count
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+            cumulative += bucket_count
+            labels = format_labels(label_names, values, [('le', format_value(bound))])
+            lines.append(f"{name}_bucket{labels} {cumulative}")
+        labels = format_labels(label_names, values)
+        lines.append(f"{name}_sum{labels} {format_value(total)}")
+        lines.append(f"{name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    """Ordered collection of metric families rendered together for a scrape."""
+    def __init__(self) -> None:
+        self._metrics = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labels=(), function=None) -> Counter:
+        return self.register(Counter(name, help, labels, function))
+
+    def gauge(self, name: str, help: str, function) -> Gauge:
+        return self.register(Gauge(name, help, function))
+
+    def histogram(self, name: str, help: str, labels=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsServer:
+    """Serves ``GET /metrics`` for one Registry from a daemon thread."""
+    def __init__(self, registry: Registry, host: str = '127.0.0.1', port: int = 9464) -> None:
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.httpd = None
+
+    def start(self) -> None:
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+
+
+class RateLimitFilter(logging.Filter):
+    """Let through at most ``burst`` records per message template per ``period`` seconds.
+
+    Records are keyed by their unformatted message, so lazily formatted
+    calls such as ``log.info("New connection from %s", address)`` share one
+    budget. The first record let through after a suppressed stretch notes
+    how many were dropped.
+    """
+    def __init__(self, burst: int = 10, period: float = 1.0, clock=time.monotonic) -> None:
+        super().__init__()
+        self.burst = burst
+        self.period = period
+        self.clock = clock
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = (record.name, record.msg)
+        now = self.clock()
+        with self._lock:
+            started, count, suppressed = self._windows.get(key, (now, 0, 0))
+            if now - started >= self.period:
+                started, count = now, 0
+            if count >= self.burst:
+                self._windows[key] = (started, count, suppressed + 1)
+                return False
+            self._windows[key] = (started, count + 1, 0)
+        if suppressed:
+            record.msg = f"{record.msg} ({suppressed} similar messages suppressed)"
+        return True
+
+
+def configure_logging(level: str = 'INFO', burst: int = 10, period: float = 1.0) -> None:
+    """Send leveled, rate-limited log records to stderr."""
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+    handler.addFilter(RateLimitFilter(burst, period))
+    logging.basicConfig(level=level.upper(), handlers=[handler], force=True)
@@ -0,0 +1,190 @@
+"""Versioned, non-destructive schema migrations for the SushiSocial database.
+
+The schema version lives in ``PRAGMA user_version``. Each entry in
+MIGRATIONS upgrades the database by one version, and all pending steps run
+in a single transaction that also bumps the version, so a failed upgrade
+leaves the database untouched. Steps are idempotent: they must also be
+safe on databases created before versioning existed, which already hold
+some of the tables. Once the database is current, startup costs a single
+pragma read and no DDL at all.
+"""
+
+import logging
+import sqlite3
+
+from auth import SESSIONS_SCHEMA
+from blobs import BLOB_DIR, BlobStore
+from database import Database
+from repository import INDEXES, STATS_BACKFILL_SQL, STATS_SCHEMA
+from search import SCHEMA as SEARCH_SCHEMA
+
+BASE_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY,
+        username TEXT UNIQUE,
+        password TEXT,
+        bio TEXT DEFAULT '',
+        avatar_hash TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS posts (
+        id INTEGER PRIMARY KEY,
+        title TEXT NOT NULL,
+        content TEXT,
+        user_id INTEGER,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS comments (
+        id INTEGER PRIMARY KEY,
+        content TEXT NOT NULL,
+        user_id INTEGER,
+        post_id INTEGER,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users (id),
+        FOREIGN KEY (post_id) REFERENCES posts (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS ratings (
+        id INTEGER PRIMARY KEY,
+        user_id INTEGER,
+        post_id INTEGER,
+        rating INTEGER CHECK(rating IN (1,2,3,4,5)),
+        FOREIGN KEY (user_id) REFERENCES users (id),
+        FOREIGN KEY (post_id) REFERENCES posts (id),
+        UNIQUE(user_id, post_id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS post_reactions (
+        id INTEGER PRIMARY KEY,
+        post_id INTEGER,
+        user_id INTEGER,
+        is_like BOOLEAN,
+        FOREIGN KEY (post_id) REFERENCES posts (id),
+        FOREIGN KEY (user_id) REFERENCES users (id),
+        UNIQUE(post_id, user_id)
+    )""",
+)
+
+log = logging.getLogger('sushi.migrations')
+
+# Columns added after the first release; older databases lack them.
+BLOB_COLUMNS = (
+    ('users', 'avatar_hash', 'TEXT'),
+)
+
+
+def table_exists(conn: sqlite3.Connection, name: str) -> bool:
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = ?", (name,)
+    ).fetchone() is not None
+
+
+def column_exists(conn: sqlite3.Connection, table: str, column: str) -> bool:
+    return any(row[1] == column for row in conn.execute(f"PRAGMA table_info({table})"))
+
+
+def create_base_schema(conn: sqlite3.Connection) -> None:
+    for statement in BASE_SCHEMA:
+        conn.execute(statement)
+
+
+def add_blob_columns(conn: sqlite3.Connection) -> None:
+    for table, column, decl in BLOB_COLUMNS:
+        if not column_exists(conn, table, column):
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+
+def create_indexes(conn: sqlite3.Connection) -> None:
+    for statement in INDEXES:
+        conn.execute(statement)
+
+
+def create_stats_table(conn: sqlite3.Connection) -> None:
+    """Create post_stats and its triggers, backfilling it when first created."""
+    exists = table_exists(conn, 'post_stats')
+    for statement in STATS_SCHEMA:
+        conn.execute(statement)
+    if not exists:
+        conn.execute(STATS_BACKFILL_SQL)
+
+
+def create_search_index(conn: sqlite3.Connection) -> None:
+    """Create the FTS tables and triggers, indexing rows that already exist."""
+    existing = {table for table in ('posts_fts', 'comments_fts') if table_exists(conn, table)}
+    for statement in SEARCH_SCHEMA:
+        conn.execute(statement)
+    for table in ('posts_fts', 'comments_fts'):
+        if table not in existing:
+            conn.execute(f"INSERT INTO {table}({table}) VALUES ('rebuild')")
+
+
+def create_sessions_table(conn: sqlite3.Connection) -> None:
+    """Create the table of remembered-login tokens; passwords are rehashed on login."""
+    for statement in SESSIONS_SCHEMA:
+        conn.execute(statement)
+
+
+def import_avatar_paths(conn: sqlite3.Connection) -> None:
+    """Copy avatars referenced by the old users.avatar_path column into the blob store.
+
+    avatar_path is kept, so an avatar whose file cannot be read now is not
+    forgotten; it is logged instead.
+    """
+    if not column_exists(conn, 'users', 'avatar_path'):
+        return
+    rows = conn.execute(
+        "SELECT id, username, avatar_path FROM users "
+        "WHERE avatar_path IS NOT NULL AND avatar_path != '' AND avatar_hash IS NULL"
+    ).fetchall()
+    store = BlobStore(BLOB_DIR) if rows else None
+    for user_id, username, path in rows:
+        try:
+            digest = store.put_file(path)
+        except OSError as e:
+            log.warning("Avatar of %s not imported, cannot read %s: %s", username, path, e)
+            continue
+        conn.execute("UPDATE users SET avatar_hash = ? WHERE id = ?", (digest, user_id))
+
+
+def drop_post_image_hash(conn: sqlite3.Connection) -> None:
+    """Remove posts.image_hash from databases that were created with it; nothing used it."""
+    if column_exists(conn, 'posts', 'image_hash'):
+        conn.execute("ALTER TABLE posts DROP COLUMN image_hash")
+
+
+# MIGRATIONS[n] upgrades a database from user_version n to n + 1. Append
+# new steps; never edit or reorder released ones.
+MIGRATIONS = (
+    create_base_schema,
+    add_blob_columns,
+    create_indexes,
+    create_stats_table,
+    create_search_index,
+    create_sessions_table,
+    import_avatar_paths,
+    drop_post_image_hash,
+)
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(db: Database) -> int:
+    """Apply pending migrations and return the number of steps that ran."""
+    conn = db.connection()
+    if schema_version(conn) >= SCHEMA_VERSION:
+        return 0
+    # BEGIN IMMEDIATE takes the write lock before the version is re-read,
+    # so two processes starting at once cannot both run the same steps.
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        version = schema_version(conn)
+        for step in MIGRATIONS[version:]:
+            step(conn)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return max(SCHEMA_VERSION - version, 0)
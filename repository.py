@@ -0,0 +1,262 @@
+"""Set-based read queries for the SushiSocial feed.
+
+The feed used to issue two reaction counts and one comment query per post.
+FeedRepository answers the same questions for a whole page of posts with a
+fixed number of queries, reading counters from the trigger-maintained
+post_stats table. Post ids are passed as a single JSON array
+parameter, so the SQL text is constant and stays in the statement cache
+regardless of page size.
+"""
+
+import copy
+
+from database import Database
+
+COMMENTS_PER_POST = 20
+PAGE_SIZE = 50
+
+# Feed rows share the shape returned by the posts API:
+# (title, content, author, id, timestamp).
+FIRST_PAGE_SQL = """
+    SELECT p.title, p.content, u.username, p.id, p.timestamp
+    FROM posts p
+    LEFT JOIN users u ON p.user_id = u.id
+    ORDER BY p.timestamp DESC, p.id DESC
+    LIMIT ?
+"""
+
+NEXT_PAGE_SQL = """
+    SELECT p.title, p.content, u.username, p.id, p.timestamp
+    FROM posts p
+    LEFT JOIN users u ON p.user_id = u.id
+    WHERE (p.timestamp, p.id) < (?, ?)
+    ORDER BY p.timestamp DESC, p.id DESC
+    LIMIT ?
+"""
+
+STATS_SQL = """
+    WITH viewer(id) AS (VALUES (?))
+    SELECT ids.value,
+           COALESCE(s.likes, 0),
+           COALESCE(s.dislikes, 0),
+           CAST(s.rating_sum AS REAL) / NULLIF(s.rating_count, 0),
+           COALESCE(s.rating_count, 0),
+           COALESCE(s.comment_count, 0),
+           mine.is_like,
+           my_rating.rating
+    FROM (SELECT DISTINCT value FROM json_each(?)) ids
+    LEFT JOIN post_stats s ON s.post_id = ids.value
+    LEFT JOIN post_reactions mine
+        ON mine.post_id = ids.value AND mine.user_id = (SELECT id FROM viewer)
+    LEFT JOIN ratings my_rating
+        ON my_rating.post_id = ids.value AND my_rating.user_id = (SELECT id FROM viewer)
+"""
+
+# post_stats holds exact per-post counters maintained by the triggers
+# below, so reading them is a primary-key lookup instead of a COUNT(*).
+# Rows are created with INSERT ... WHERE NOT EXISTS rather than INSERT OR
+# IGNORE, because an outer INSERT OR REPLACE (as used for reaction and
+# rating toggles) would override the trigger's conflict clause and reset
+# the counters.
+STATS_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS post_stats (
+        post_id INTEGER PRIMARY KEY,
+        likes INTEGER NOT NULL DEFAULT 0,
+        dislikes INTEGER NOT NULL DEFAULT 0,
+        rating_sum INTEGER NOT NULL DEFAULT 0,
+        rating_count INTEGER NOT NULL DEFAULT 0,
+        comment_count INTEGER NOT NULL DEFAULT 0
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS post_stats_reaction_insert AFTER INSERT ON post_reactions BEGIN
+        INSERT INTO post_stats (post_id) SELECT new.post_id
+        WHERE NOT EXISTS (SELECT 1 FROM post_stats WHERE post_id = new.post_id);
+        UPDATE post_stats
+        SET likes = likes + (CASE WHEN new.is_like THEN 1 ELSE 0 END),
+            dislikes = dislikes + (CASE WHEN new.is_like THEN 0 ELSE 1 END)
+        WHERE post_id = new.post_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS post_stats_reaction_delete AFTER DELETE ON post_reactions BEGIN
+        UPDATE post_stats
+        SET likes = likes - (CASE WHEN old.is_like THEN 1 ELSE 0 END),
+            dislikes = dislikes - (CASE WHEN old.is_like THEN 0 ELSE 1 END)
+        WHERE post_id = old.post_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS post_stats_reaction_update AFTER UPDATE ON post_reactions BEGIN
+        UPDATE post_stats
+        SET likes = likes - (CASE WHEN old.is_like THEN 1 ELSE 0 END),
+            dislikes = dislikes - (CASE WHEN old.is_like THEN 0 ELSE 1 END)
+        WHERE post_id = old.post_id;
+        INSERT INTO post_stats (post_id) SELECT new.post_id
+        WHERE NOT EXISTS (SELECT 1 FROM post_stats WHERE post_id = new.post_id);
+        UPDATE post_stats
+        SET likes = likes + (CASE WHEN new.is_like THEN 1 ELSE 0 END),
+            dislikes = dislikes + (CASE WHEN new.is_like THEN 0 ELSE 1 END)
+        WHERE post_id = new.post_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS post_stats_rating_insert AFTER INSERT ON ratings BEGIN
+        INSERT INTO post_stats (post_id) SELECT new.post_id
+        WHERE NOT EXISTS (SELECT 1 FROM post_stats WHERE post_id = new.post_id);
+        UPDATE post_stats
+        SET rating_sum = rating_sum + new.rating, rating_count = rating_count + 1
+        WHERE post_id = new.post_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS post_stats_rating_delete AFTER DELETE ON ratings BEGIN
+        UPDATE post_stats
+        SET rating_sum = rating_sum - old.rating, rating_count = rating_count - 1
+        WHERE post_id = old.post_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS post_stats_rating_update AFTER UPDATE ON ratings BEGIN
+        UPDATE post_stats
+        SET rating_sum = rating_sum - old.rating, rating_count = rating_count - 1
+        WHERE post_id = old.post_id;
+        INSERT INTO post_stats (post_id) SELECT new.post_id
+        WHERE NOT EXISTS (SELECT 1 FROM post_stats WHERE post_id = new.post_id);
+        UPDATE post_stats
+        SET rating_sum = rating_sum + new.rating, rating_count = rating_count + 1
+        WHERE post_id = new.post_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS post_stats_comment_insert AFTER INSERT ON comments BEGIN
+        INSERT INTO post_stats (post_id) SELECT new.post_id
+        WHERE NOT EXISTS (SELECT 1 FROM post_stats WHERE post_id = new.post_id);
+        UPDATE post_stats SET comment_count = comment_count + 1 WHERE post_id = new.post_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS post_stats_comment_delete AFTER DELETE ON comments BEGIN
+        UPDATE post_stats SET comment_count = comment_count - 1 WHERE post_id = old.post_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS post_stats_comment_update AFTER UPDATE OF post_id ON comments BEGIN
+        UPDATE post_stats SET comment_count = comment_count - 1 WHERE post_id = old.post_id;
+        INSERT INTO post_stats (post_id) SELECT new.post_id
+        WHERE NOT EXISTS (SELECT 1 FROM post_stats WHERE post_id = new.post_id);
+        UPDATE post_stats SET comment_count = comment_count + 1 WHERE post_id = new.post_id;
+    END""",
+)
+
+STATS_BACKFILL_SQL = """
+    INSERT INTO post_stats (post_id, likes, dislikes, rating_sum, rating_count, comment_count)
+    SELECT post_id, SUM(likes), SUM(dislikes), SUM(rating_sum), SUM(rating_count), SUM(comments)
+    FROM (
+        SELECT post_id,
+               SUM(CASE WHEN is_like THEN 1 ELSE 0 END) AS likes,
+               SUM(CASE WHEN is_like THEN 0 ELSE 1 END) AS dislikes,
+               0 AS rating_sum, 0 AS rating_count, 0 AS comments
+        FROM post_reactions GROUP BY post_id
+        UNION ALL
+        SELECT post_id, 0, 0, SUM(rating), COUNT(*), 0 FROM ratings GROUP BY post_id
+        UNION ALL
+        SELECT post_id, 0, 0, 0, 0, COUNT(*) FROM comments GROUP BY post_id
+    )
+    WHERE post_id IS NOT NULL
+    GROUP BY post_id
+"""
+
+LATEST_COMMENTS_SQL = """
+    SELECT post_id, content, username FROM (
+        SELECT c.post_id, c.content, u.username,
+               ROW_NUMBER() OVER (
+                   PARTITION BY c.post_id ORDER BY c.timestamp DESC, c.id DESC
+               ) AS position
+        FROM comments c
+        JOIN users u ON c.user_id = u.id
+        WHERE c.post_id IN (SELECT value FROM json_each(?))
+    )
+    WHERE position <= ?
+    ORDER BY post_id, position
+"""
+
+INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_post_reactions_post ON post_reactions (post_id, is_like)",
+    "CREATE INDEX IF NOT EXISTS idx_comments_post_time ON comments (post_id, timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_ratings_post ON ratings (post_id)",
+    "CREATE INDEX IF NOT EXISTS idx_posts_timestamp_id ON posts (timestamp, id)",
+)
+
+
+class PostStats:
+    """Aggregated reactions, rating and latest comments for one post.
+
+    ``my_reaction`` and ``my_rating`` are the viewing user's own reaction
+    and rating, which lets the with_* helpers predict the counters after an
+    action before it has been written.
+    """
+    def __init__(self, post_id: int, likes: int = 0, dislikes: int = 0,
+                 average_rating: float = None, rating_count: int = 0,
+                 comment_count: int = 0, my_reaction=None, my_rating: int = None) -> None:
+        self.post_id = post_id
+        self.likes = likes
+        self.dislikes = dislikes
+        self.average_rating = average_rating
+        self.rating_count = rating_count
+        self.comment_count = comment_count
+        self.my_reaction = None if my_reaction is None else bool(my_reaction)
+        self.my_rating = my_rating
+        self.comments = []
+
+    def with_reaction(self, is_like: bool) -> 'PostStats':
+        stats = copy.copy(self)
+        if stats.my_reaction is True:
+            stats.likes -= 1
+        elif stats.my_reaction is False:
+            stats.dislikes -= 1
+        if is_like:
+            stats.likes += 1
+        else:
+            stats.dislikes += 1
+        stats.my_reaction = is_like
+        return stats
+
+    def with_rating(self, rating: int) -> 'PostStats':
+        stats = copy.copy(self)
+        total = (stats.average_rating or 0) * stats.rating_count
+        if stats.my_rating is None:
+            stats.rating_count += 1
+        else:
+            total -= stats.my_rating
+        stats.average_rating = (total + rating) / stats.rating_count
+        stats.my_rating = rating
+        return stats
+
+    def with_comment(self, content: str, username: str) -> 'PostStats':
+        stats = copy.copy(self)
+        stats.comments = [(content, username)] + self.comments
+        stats.comment_count += 1
+        return stats
+
+
+class FeedRepository:
+    """Batched feed lookups on top of the shared Database."""
+    def __init__(self, db: Database, comments_per_post: int = COMMENTS_PER_POST) -> None:
+        self.db = db
+        self.comments_per_post = comments_per_post
+        # User id whose own reaction and rating post_stats reports.
+        self.viewer = None
+
+    def page_posts(self, cursor=None, limit: int = PAGE_SIZE) -> list:
+        """Return up to limit posts, newest first, strictly older than cursor.
+
+        cursor is the (timestamp, id) of the last post already shown, as
+        returned by post_cursor; None starts from the newest post.
+        """
+        if cursor is None:
+            return self.db.fetchall(FIRST_PAGE_SQL, (limit,))
+        return self.db.fetchall(NEXT_PAGE_SQL, (*cursor, limit))
+
+    def post_stats(self, post_ids) -> dict:
+        """Return a PostStats per id from post_stats plus one latest-comments query."""
+        ids = json_ids(post_ids)
+        stats = {}
+        for row in self.db.fetchall(STATS_SQL, (self.viewer, ids)):
+            stats[row[0]] = PostStats(*row)
+        for post_id, content, username in self.db.fetchall(
+                LATEST_COMMENTS_SQL, (ids, self.comments_per_post)):
+            stats[post_id].comments.append((content, username))
+        return stats
+
+
+def post_cursor(post) -> tuple:
+    """Keyset pagination cursor, (timestamp, id), for a feed row."""
+    return post[4], post[3]
+
+
+def json_ids(post_ids) -> str:
+    """Serialise ids as a JSON array suitable for json_each()."""
+    return '[' + ','.join(str(int(post_id)) for post_id in post_ids) + ']'
@@ -0,0 +1,84 @@
+"""Full-text search over posts and comments backed by SQLite FTS5.
+
+posts_fts and comments_fts are external-content FTS5 tables that index
+the existing rows, and triggers keep them in sync on every insert, update
+and delete. Results are ranked with bm25, title matches weigh more than
+body matches, and a comment match counts for half of a post match.
+"""
+
+import re
+
+from database import Database
+
+SEARCH_PAGE_SIZE = 50
+
+SCHEMA = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(
+        title, content, content='posts', content_rowid='id', tokenize='unicode61'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS posts_fts_insert AFTER INSERT ON posts BEGIN
+        INSERT INTO posts_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS posts_fts_delete AFTER DELETE ON posts BEGIN
+        INSERT INTO posts_fts(posts_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS posts_fts_update AFTER UPDATE OF title, content ON posts BEGIN
+        INSERT INTO posts_fts(posts_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO posts_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS comments_fts USING fts5(
+        content, content='comments', content_rowid='id', tokenize='unicode61'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS comments_fts_insert AFTER INSERT ON comments BEGIN
+        INSERT INTO comments_fts(rowid, content) VALUES (new.id, new.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS comments_fts_delete AFTER DELETE ON comments BEGIN
+        INSERT INTO comments_fts(comments_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS comments_fts_update AFTER UPDATE OF content ON comments BEGIN
+        INSERT INTO comments_fts(comments_fts, rowid, content) VALUES ('delete', old.id, old.content);
+        INSERT INTO comments_fts(rowid, content) VALUES (new.id, new.content);
+    END""",
+)
+
+SEARCH_SQL = """
+    WITH matches(post_id, score) AS (
+        SELECT rowid, bm25(posts_fts, 10.0, 1.0)
+        FROM posts_fts WHERE posts_fts MATCH :query
+        UNION ALL
+        SELECT c.post_id, bm25(comments_fts) * 0.5
+        FROM comments_fts JOIN comments c ON c.id = comments_fts.rowid
+        WHERE comments_fts MATCH :query
+    ),
+    ranked AS (
+        SELECT post_id, MIN(score) AS score FROM matches GROUP BY post_id
+    )
+    SELECT p.title, p.content, u.username, p.id, p.timestamp
+    FROM ranked
+    JOIN posts p ON p.id = ranked.post_id
+    LEFT JOIN users u ON u.id = p.user_id
+    ORDER BY ranked.score, p.id DESC
+    LIMIT :limit OFFSET :offset
+"""
+
+TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+
+def match_expression(text: str) -> str:
+    """Turn free text into an FTS5 query where every word is a prefix term."""
+    return ' '.join(f'"{token}"*' for token in TOKEN_PATTERN.findall(text))
+
+
+class PostSearch:
+    """Ranked, paged full-text search over posts and their comments."""
+    def __init__(self, db: Database) -> None:
+        self.db = db
+
+    def search(self, text: str, limit: int = SEARCH_PAGE_SIZE, offset: int = 0) -> list:
+        """Feed rows matching text, best match first; empty text matches nothing."""
+        query = match_expression(text)
+        if not query:
+            return []
+        return self.db.fetchall(SEARCH_SQL, {'query': query, 'limit': limit, 'offset': offset})
@@ -1,61 +1,597 @@
-import socket
-import threading
-import json
-from datetime import datetime
-
-class SushiServer:
-    def __init__(self, host='0.0.0.0', port=5000):
-        self.host = host
-        self.port = port
-        self.clients = []
-
-    def start(self):
-        self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.server_socket.bind((self.host, self.port))
-        self.server_socket.listen(5)
-        print(f"Server started on {self.host}:{self.port}")
-
-        while True:
-            client_socket, client_address = self.server_socket.accept()
-            print(f"New connection from {client_address}")
-            self.clients.append(client_socket)
-            threading.Thread(target=self.handle_client, args=(client_socket,)).start()
-
-    def handle_client(self, client_socket):
-        while True:
-            try:
-                message = client_socket.recv(1024).decode()
-                if message:
-                    data = json.loads(message)
-                    if data['type'] == 'heartbeat':
-                        self.handle_heartbeat(client_socket)
-                    elif data['type'] == 'thread':
-                        self.handle_thread(data)
-                        self.broadcast(client_socket, message)
-            except Exception as e:
-                print(f"Error: {e}")
-                self.clients.remove(client_socket)
-                client_socket.close()
-                break
-
-    def handle_heartbeat(self, client_socket):
-        print("Heartbeat received")
-        client_socket.send(json.dumps({'type': 'heartbeat_ack'}).encode())
-
-    def handle_thread(self, data):
-        print(f"New thread from {data['author']}: {data['content']}")
-        if data['image']:
-            print(f"Image attached: {data['image'][:30]}...")
-
-    def broadcast(self, client_socket, message):
-        for client in self.clients:
-            if client != client_socket:
-                try:
-                    client.send(message.encode())
-                except:
-                    self.clients.remove(client)
-                    client.close()
-
-if __name__ == "__main__":
-    server = SushiServer()
-    server.start()
+import argparse
+import asyncio
+import logging
+import socket
+import sys
+import threading
+import time
+from datetime import datetime
+
+from blobs import BLOB_DIR, BlobNotFound, BlobStore
+from codec import CODECS, JSON, CodecError, MessageFrames, negotiate
+from broadcast import (
+    DROP_OLDEST, SLOW_CONSUMER_POLICIES, BroadcastStats, ClientRegistry, OutboundQueue
+)
+from liveness import TimerWheel
+from framing import (
+    HEADER_SIZE, MAX_FRAME_SIZE, Frame, FrameBatch, FrameDecoder, read_frames, recv_frames,
+    send_buffers
+)
+from metrics import MetricsServer, Registry, configure_logging
+from threadlog import ThreadLog
+
+ENGINES = ('threaded', 'asyncio')
+BLOB_CHUNK_SIZE = 256 * 1024
+CATCHUP_BATCH_BYTES = 1024 * 1024
+# Segments of the thread log kept on disk; with 64 MiB segments about 1 GiB.
+LOG_MAX_SEGMENTS = 16
+# Before 3.12, StreamWriter.writelines joins its buffers instead of using sendmsg.
+WRITELINES_COPIES = sys.version_info < (3, 12)
+RECIPIENT_BUCKETS = (0, 1, 10, 100, 1000, 10000)
+# Message types counted by name; anything else is counted as 'other' so
+# clients cannot create unbounded label values.
+MESSAGE_TYPES = frozenset({'heartbeat', 'thread', 'hello', 'resume', 'blob_put', 'blob_get'})
+
+log = logging.getLogger('sushi.server')
+
+
+class ServerMetrics:
+    """Prometheus metrics of one SushiServer process.
+
+    Gauges that describe every client (connections, queue depths) are read
+    from the registry at scrape time, so the hot path only pays for the
+    counters and histograms it updates.
+    """
+    def __init__(self, server):
+        self.server = server
+        self.retired_frame_drops = 0
+        registry = self.registry = Registry()
+        registry.gauge('sushi_connected_clients', "Clients currently connected.",
+                       function=lambda: len(server.clients))
+        self.messages = registry.counter(
+            'sushi_messages_received_total', "Messages received from clients, by type.",
+            labels=('type',))
+        self.bytes_received = registry.counter(
+            'sushi_bytes_received_total', "Framed bytes read from clients.")
+        self.bytes_sent = registry.counter(
+            'sushi_bytes_sent_total', "Framed bytes written to clients.")
+        self.message_seconds = registry.histogram(
+            'sushi_message_seconds', "Time to decode and handle one client message.")
+        self.broadcast_seconds = registry.histogram(
+            'sushi_broadcast_seconds', "Time to queue one broadcast for every recipient.")
+        self.broadcast_recipients = registry.histogram(
+            'sushi_broadcast_recipients', "Clients a broadcast was queued for.",
+            buckets=RECIPIENT_BUCKETS)
+        registry.gauge('sushi_outbound_queue_depth_max',
+                       "Frames waiting in the fullest client outbound queue.",
+                       function=lambda: max(self.queue_depths(), default=0))
+        registry.gauge('sushi_outbound_queue_depth_total',
+                       "Frames waiting in all client outbound queues.",
+                       function=lambda: sum(self.queue_depths()))
+        registry.counter('sushi_outbound_frames_dropped_total',
+                         "Outbound frames discarded by the slow-consumer policy.",
+                         function=self.frame_drops)
+        self.dropped_clients = registry.counter(
+            'sushi_dropped_clients_total', "Clients disconnected by the server, by reason.",
+            labels=('reason',))
+        registry.counter('sushi_broadcast_bytes_copied_total',
+                         "Bytes copied while fanning out broadcasts, including writer copies.",
+                         function=lambda: server.broadcast_stats.bytes_copied)
+        self.bytes_copied = registry.counter(
+            'sushi_writer_bytes_copied_total',
+            "Bytes connection writers copied to send any frame, not only broadcasts.")
+        registry.gauge('sushi_thread_log_last_seq', "Sequence number of the newest logged thread.",
+                       function=lambda: server.thread_log.last_seq if server.thread_log else 0)
+
+    def queue_depths(self):
+        return [len(client.outbound) for client in self.server.clients]
+
+    def frame_drops(self):
+        return self.retired_frame_drops + sum(
+            client.outbound.dropped for client in self.server.clients)
+
+    def client_dropped(self, client, reason):
+        self.retired_frame_drops += client.outbound.dropped
+        self.dropped_clients.labels(reason).inc()
+
+
+class ThreadedConnection:
+    """Client socket with a dedicated writer thread draining its outbound queue."""
+    def __init__(self, sock, address, queue_size, policy, sent=None, copied=None):
+        self.sock = sock
+        self.address = address
+        self.codec = JSON
+        self.closed = False
+        self.sent = sent
+        self.copied = copied
+        self._wakeup = threading.Event()
+        self.outbound = OutboundQueue(queue_size, policy, self._wakeup.set)
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+
+    def start(self):
+        self._writer.start()
+
+    def send_frame(self, frame, key=None):
+        return self.outbound.put(frame, key)
+
+    def _write_loop(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            if self.closed:
+                return
+            frames = self.outbound.drain()
+            if frames:
+                buffers = [buffer for frame in frames for buffer in frame.buffers]
+                try:
+                    copied = send_buffers(self.sock, buffers)
+                except OSError:
+                    self.close()
+                    return
+                if copied and self.copied is not None:
+                    self.copied.inc(copied)
+                if self.sent is not None:
+                    self.sent.inc(sum(len(frame) for frame in frames))
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self._wakeup.set()
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+class AsyncConnection:
+    """Asyncio stream pair with a writer task draining its outbound queue."""
+    def __init__(self, reader, writer, queue_size, policy, sent=None, copied=None):
+        self.reader = reader
+        self.writer = writer
+        self.address = writer.get_extra_info('peername')
+        self.codec = JSON
+        self.closed = False
+        self.sent = sent
+        self.copied = copied
+        self._wakeup = asyncio.Event()
+        self.outbound = OutboundQueue(queue_size, policy, self._wakeup.set)
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._write_loop())
+
+    def send_frame(self, frame, key=None):
+        return self.outbound.put(frame, key)
+
+    async def _write_loop(self):
+        try:
+            while not self.closed:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                frames = self.outbound.drain()
+                if frames:
+                    buffers = [buffer for frame in frames for buffer in frame.buffers]
+                    self.writer.writelines(buffers)
+                    size = sum(len(frame) for frame in frames)
+                    if WRITELINES_COPIES and self.copied is not None:
+                        self.copied.inc(size)
+                    await self.writer.drain()
+                    if self.sent is not None:
+                        self.sent.inc(size)
+        except (ConnectionError, OSError):
+            self.close()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self._wakeup.set()
+        self.writer.close()
+
+
+class SushiServer:
+    def __init__(self, host='0.0.0.0', port=5000, backlog=128, engine='threaded',
+                 max_frame_size=MAX_FRAME_SIZE, queue_size=256, slow_consumer=DROP_OLDEST,
+                 reuse_port=False, heartbeat_interval=10.0, heartbeat_timeout=30.0,
+                 blob_dir=BLOB_DIR, log_dir='threadlog', log_max_segments=LOG_MAX_SEGMENTS,
+                 metrics_host='127.0.0.1', metrics_port=None):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine {engine!r}, expected one of {ENGINES}")
+        if slow_consumer not in SLOW_CONSUMER_POLICIES:
+            raise ValueError(f"Unknown slow-consumer policy {slow_consumer!r}")
+        self.host = host
+        self.port = port
+        self.backlog = backlog
+        self.engine = engine
+        self.max_frame_size = max_frame_size
+        self.queue_size = queue_size
+        self.slow_consumer = slow_consumer
+        self.reuse_port = reuse_port
+        self.bus = None
+        self.loop = None
+        self.clients = ClientRegistry()
+        self.blobs = BlobStore(blob_dir)
+        self.thread_log = ThreadLog(log_dir, max_segments=log_max_segments) if log_dir else None
+        self.thread_lock = threading.Lock()
+        self.broadcast_stats = BroadcastStats()
+        # Whether this engine's writers join a frame's buffers into a new
+        # bytes object for every recipient.
+        if engine == 'asyncio':
+            self.writer_copies = WRITELINES_COPIES
+        else:
+            self.writer_copies = not hasattr(socket.socket, 'sendmsg')
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.liveness = TimerWheel(heartbeat_timeout, tick=min(1.0, heartbeat_timeout / 4))
+        self.heartbeat_ack = MessageFrames({
+            'type': 'heartbeat_ack',
+            'interval': heartbeat_interval,
+            'timeout': heartbeat_timeout,
+        })
+        self.metrics = ServerMetrics(self)
+        self.metrics_server = None
+        if metrics_port is not None:
+            self.metrics_server = MetricsServer(self.metrics.registry, metrics_host, metrics_port)
+
+    def start(self):
+        if self.metrics_server is not None:
+            self.metrics_server.start()
+            log.info("Metrics on http://%s:%s/metrics",
+                     self.metrics_server.host, self.metrics_server.port)
+        if self.engine == 'asyncio':
+            asyncio.run(self.serve_async())
+        else:
+            self.serve_threaded()
+
+    def serve_threaded(self):
+        self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if self.reuse_port:
+            self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        self.server_socket.bind((self.host, self.port))
+        self.server_socket.listen(self.backlog)
+        log.info("Server started on %s:%s (threaded)", self.host, self.port)
+        threading.Thread(target=self.reap_idle_clients, daemon=True).start()
+
+        while True:
+            client_socket, client_address = self.server_socket.accept()
+            log.debug("New connection from %s", client_address)
+            client = ThreadedConnection(client_socket, client_address, self.queue_size,
+                                        self.slow_consumer, self.metrics.bytes_sent,
+                                        self.metrics.bytes_copied)
+            self.register_client(client)
+            threading.Thread(target=self.handle_client, args=(client,), daemon=True).start()
+
+    async def serve_async(self):
+        self.loop = asyncio.get_running_loop()
+        server = await asyncio.start_server(
+            self.handle_client_async, self.host, self.port,
+            backlog=self.backlog, reuse_address=True, reuse_port=self.reuse_port or None
+        )
+        log.info("Server started on %s:%s (asyncio)", self.host, self.port)
+        self.reaper = asyncio.create_task(self.reap_idle_clients_async())
+        async with server:
+            await server.serve_forever()
+
+    def register_client(self, client):
+        self.clients.add(client)
+        self.liveness.touch(client)
+        client.start()
+
+    def reap_expired(self):
+        for client in self.liveness.expire():
+            log.info("Reaping idle client %s", client.address)
+            self.drop_client(client, 'idle')
+
+    def reap_idle_clients(self):
+        while True:
+            time.sleep(self.liveness.tick)
+            self.reap_expired()
+
+    async def reap_idle_clients_async(self):
+        while True:
+            await asyncio.sleep(self.liveness.tick)
+            self.reap_expired()
+
+    def handle_client(self, client):
+        decoder = FrameDecoder(self.max_frame_size)
+        while True:
+            try:
+                for frame in recv_frames(client.sock, decoder):
+                    self.process_message(client, frame)
+            except Exception as e:
+                self.client_failed(client, e)
+                break
+
+    async def handle_client_async(self, reader, writer):
+        client = AsyncConnection(reader, writer, self.queue_size, self.slow_consumer,
+                                 self.metrics.bytes_sent, self.metrics.bytes_copied)
+        log.debug("New connection from %s", client.address)
+        self.register_client(client)
+        decoder = FrameDecoder(self.max_frame_size)
+        while True:
+            try:
+                for frame in await read_frames(reader, decoder):
+                    self.process_message(client, frame)
+            except Exception as e:
+                self.client_failed(client, e)
+                break
+
+    def client_failed(self, client, error):
+        """Drop a client whose connection closed or sent something unusable."""
+        if client not in self.clients:
+            # Already dropped by the server, which closed the socket under the reader.
+            self.drop_client(client)
+            return
+        if isinstance(error, ConnectionError):
+            log.debug("Connection from %s closed: %s", client.address, error)
+            self.drop_client(client, 'closed')
+        else:
+            log.warning("Dropping client %s: %s", client.address, error)
+            self.drop_client(client, 'error')
+
+    def process_message(self, client, frame):
+        started = time.perf_counter()
+        self.liveness.touch(client)
+        data = client.codec.decode(frame)
+        self.metrics.bytes_received.inc(HEADER_SIZE + len(frame))
+        kind = data.get('type')
+        self.metrics.messages.labels(kind if kind in MESSAGE_TYPES else 'other').inc()
+        try:
+            self.dispatch(client, data)
+        finally:
+            self.metrics.message_seconds.observe(time.perf_counter() - started)
+
+    def dispatch(self, client, data):
+        if data['type'] == 'heartbeat':
+            self.handle_heartbeat(client)
+        elif data['type'] == 'thread':
+            self.publish_thread(client, data)
+        elif data['type'] == 'hello':
+            self.handle_hello(client, data)
+        elif data['type'] == 'resume':
+            self.handle_resume(client, data)
+        elif data['type'] == 'blob_put':
+            self.handle_blob_put(client, data)
+        elif data['type'] == 'blob_get':
+            self.handle_blob_get(client, data)
+
+    def deliver_remote(self, payload):
+        """Broadcast a thread published by another worker; may be called from any thread.
+
+        Workers relay JSON, which is only decoded if a local client uses
+        another codec.
+        """
+        message = MessageFrames(payloads={JSON.name: payload}, max_frame_size=self.max_frame_size)
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.broadcast_remote, message)
+        else:
+            self.broadcast_remote(message)
+
+    def broadcast_remote(self, message):
+        with self.thread_lock:
+            self.broadcast(None, message)
+
+    def drop_client(self, client, reason='error'):
+        if self.clients.discard(client):
+            self.metrics.client_dropped(client, reason)
+        self.liveness.remove(client)
+        client.close()
+
+    def handle_heartbeat(self, client):
+        log.debug("Heartbeat from %s", client.address)
+        if not client.send_frame(self.heartbeat_ack.frame(client.codec), key='heartbeat_ack'):
+            self.drop_client(client, 'slow_consumer')
+
+    def handle_hello(self, client, data):
+        """Pick the client's preferred codec; the answer is still sent in the old one.
+
+        Broadcasts hold thread_lock, so holding it here means no broadcast
+        frame is queued between the answer and the switch: every frame
+        after the answer is in the new codec.
+        """
+        codec = negotiate(data.get('codecs'))
+        with self.thread_lock:
+            self.reply(client, {'type': 'hello', 'codec': codec.name, 'codecs': list(CODECS)})
+            client.codec = codec
+
+    def handle_thread(self, data):
+        """Log a thread and return the message to broadcast.
+
+        Inline images are moved into the blob store and replaced by their
+        hash, so recipients only download images they do not have.
+        """
+        log.debug("New thread from %s: %.80s", data['author'], data['content'])
+        if data.get('image'):
+            data['image_hash'] = self.blobs.put(data['image'])
+            data['image'] = None
+            log.debug("Image attached: blob %s", data['image_hash'])
+        elif data.get('image_hash'):
+            log.debug("Image attached: blob %s", data['image_hash'])
+        return data
+
+    def publish_thread(self, client, data):
+        """Sequence a thread in the log and fan it out.
+
+        Appending and broadcasting happen under one lock so every client
+        receives threads in sequence order; the sender gets a thread_ack
+        carrying the seq, since it is not among the broadcast recipients.
+        The log and the worker bus store JSON, which JSON clients receive
+        without another encode.
+        """
+        data = self.handle_thread(data)
+        seq = None
+        with self.thread_lock:
+            if self.thread_log is not None:
+                seq, payload = self.thread_log.append(
+                    lambda seq: JSON.encode(dict(data, seq=seq))
+                )
+                message = MessageFrames(dict(data, seq=seq), {JSON.name: payload},
+                                        self.max_frame_size)
+            else:
+                message = MessageFrames(data, max_frame_size=self.max_frame_size)
+            self.broadcast(client, message)
+        if seq is not None:
+            self.reply(client, {'type': 'thread_ack', 'seq': seq})
+        if self.bus is not None:
+            self.bus.publish(message.frame(JSON))
+
+    def handle_resume(self, client, data):
+        """Stream the threads logged after data['seq'] to a reconnecting client.
+
+        Each request is answered with a resume header followed by up to
+        CATCHUP_BATCH_BYTES of logged threads, queued as a single batch.
+        While the header says ``more``, the client asks again from ``to``,
+        which paces the catch-up to the client's own reading speed. A
+        position that is no longer in the log gets resume_reset, and the
+        client falls back to a full reload.
+        """
+        thread_log = self.thread_log
+        after = data.get('seq', 0)
+        if thread_log is None or not thread_log.first_seq - 1 <= after <= thread_log.last_seq:
+            self.reset_resume(client)
+            return
+        try:
+            buffers, last = thread_log.read(after, CATCHUP_BATCH_BYTES)
+        except FileNotFoundError:
+            # The oldest segment was pruned while it was being read.
+            self.reset_resume(client)
+            return
+        log.info("Catch-up for %s: threads %s-%s", client.address, after + 1, last)
+        header = self.encode_frame(client, {
+            'type': 'resume',
+            'from': after,
+            'to': last,
+            'last_seq': thread_log.last_seq,
+            'more': last < thread_log.last_seq,
+        })
+        if client.codec is not JSON:
+            buffers = self.transcode(buffers, client.codec)
+        if not client.send_frame(FrameBatch(header.buffers + tuple(buffers))):
+            self.drop_client(client, 'slow_consumer')
+
+    def transcode(self, buffers, codec):
+        """Re-encode logged JSON frames for a client that negotiated another codec."""
+        decoder = FrameDecoder(self.max_frame_size)
+        return [
+            buffer
+            for payload in decoder.feed(b''.join(buffers))
+            for buffer in Frame(codec.encode(JSON.decode(payload)), self.max_frame_size).buffers
+        ]
+
+    def reset_resume(self, client):
+        thread_log = self.thread_log
+        self.reply(client, {
+            'type': 'resume_reset',
+            'first_seq': thread_log.first_seq if thread_log else None,
+            'last_seq': thread_log.last_seq if thread_log else None,
+        })
+
+    def encode_frame(self, client, message):
+        return Frame(client.codec.encode(message), self.max_frame_size)
+
+    def reply(self, client, message):
+        if not client.send_frame(self.encode_frame(client, message)):
+            self.drop_client(client, 'slow_consumer')
+
+    def handle_blob_put(self, client, data):
+        digest = self.blobs.put(data['data'])
+        self.reply(client, {'type': 'blob_ack', 'hash': digest})
+
+    def handle_blob_get(self, client, data):
+        """Send one range of a blob; clients request further ranges by offset."""
+        digest = data['hash']
+        offset = data.get('offset', 0)
+        length = data.get('length') or BLOB_CHUNK_SIZE
+        for name, value in (('offset', offset), ('length', length)):
+            if type(value) is not int or value < 0:
+                raise CodecError(f"blob_get {name} must be a non-negative integer, got {value!r}")
+        length = min(length, BLOB_CHUNK_SIZE)
+        try:
+            size = self.blobs.size(digest)
+            chunk = self.blobs.read(digest, offset, length)
+        except BlobNotFound:
+            self.reply(client, {'type': 'blob_missing', 'hash': digest})
+            return
+        self.reply(client, {
+            'type': 'blob',
+            'hash': digest,
+            'offset': offset,
+            'size': size,
+            'data': chunk,
+        })
+
+    def broadcast(self, sender, message):
+        """Queue a MessageFrames for every client but sender, in each client's codec."""
+        started = time.perf_counter()
+        recipients = {}
+        for client in self.clients.snapshot():
+            if client is sender:
+                continue
+            frame = message.frame(client.codec)
+            if client.send_frame(frame):
+                recipients[frame] = recipients.get(frame, 0) + 1
+            else:
+                log.warning("Disconnecting slow consumer %s", client.address)
+                self.drop_client(client, 'slow_consumer')
+        for frame, count in recipients.items():
+            copied = len(frame) * count if self.writer_copies else 0
+            self.broadcast_stats.record(frame, count, copied)
+        self.metrics.broadcast_seconds.observe(time.perf_counter() - started)
+        self.metrics.broadcast_recipients.observe(sum(recipients.values()))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="SushiSocial thread server")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--backlog', type=int, default=128,
+                        help="listen() backlog for pending connections")
+    parser.add_argument('--max-frame-size', type=int, default=MAX_FRAME_SIZE,
+                        help="largest accepted message in bytes")
+    parser.add_argument('--queue-size', type=int, default=256,
+                        help="outbound frames buffered per client before the slow-consumer policy applies")
+    parser.add_argument('--slow-consumer', choices=SLOW_CONSUMER_POLICIES, default=DROP_OLDEST)
+    parser.add_argument('--engine', choices=ENGINES, default='threaded',
+                        help="thread-per-connection or single asyncio event loop")
+    parser.add_argument('--heartbeat-interval', type=float, default=10.0,
+                        help="seconds between client heartbeats, advertised in heartbeat_ack")
+    parser.add_argument('--heartbeat-timeout', type=float, default=30.0,
+                        help="seconds of silence after which a client is disconnected")
+    parser.add_argument('--blob-dir', default=BLOB_DIR,
+                        help="directory of the content-addressed image store")
+    parser.add_argument('--log-dir', default='threadlog',
+                        help="directory of the thread log used for catch-up; empty disables it")
+    parser.add_argument('--log-max-segments', type=int, default=LOG_MAX_SEGMENTS,
+                        help="full thread log segments kept besides the active one; 0 keeps all")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="server processes sharing the port via SO_REUSEPORT")
+    parser.add_argument('--metrics-host', default='127.0.0.1',
+                        help="interface of the Prometheus metrics endpoint")
+    parser.add_argument('--metrics-port', type=int, default=9464,
+                        help="port of the Prometheus metrics endpoint (worker N uses port + N); "
+                             "0 disables it")
+    parser.add_argument('--log-level', default='INFO',
+                        choices=('DEBUG', 'INFO', 'WARNING', 'ERROR'),
+                        help="DEBUG logs every connection, heartbeat and thread, rate-limited")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    configure_logging(args.log_level)
+    options = dict(host=args.host, port=args.port, backlog=args.backlog, engine=args.engine,
+                   max_frame_size=args.max_frame_size, queue_size=args.queue_size,
+                   slow_consumer=args.slow_consumer,
+                   heartbeat_interval=args.heartbeat_interval,
+                   heartbeat_timeout=args.heartbeat_timeout,
+                   blob_dir=args.blob_dir, log_dir=args.log_dir,
+                   log_max_segments=args.log_max_segments or None,
+                   metrics_host=args.metrics_host, metrics_port=args.metrics_port or None)
+    if args.workers > 1:
+        from cluster import run_workers
+        run_workers(args.workers, **options)
+    else:
+        SushiServer(**options).start()
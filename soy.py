@@ -1,18 +1,35 @@
 """SushiSocial - A social media application built with PyQt6."""
 
-import sqlite3
 import sys
 from datetime import datetime
+
 import requests
 
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QPixmap
+from api import SushiAPI
+from auth import AuthError, Authenticator, Session, default_token_path
+from background import BackgroundRunner
+from blobs import BLOB_DIR, BlobStore
+from cache import FeedCache
+from database import Database
+from feed_view import FeedModel, FeedView
+from images import ImagePipeline
+from migrations import migrate
+from repository import PAGE_SIZE, FeedRepository
+from search import SEARCH_PAGE_SIZE, PostSearch
+from writebehind import WriteBehindQueue
+
+from PyQt6.QtCore import QSize, Qt, QTimer
 from PyQt6.QtWidgets import (
-    QApplication, QDialog, QFileDialog, QFrame, QHBoxLayout,
+    QApplication, QCheckBox, QDialog, QFileDialog, QHBoxLayout, QInputDialog,
     QLabel, QLineEdit, QMainWindow, QMessageBox, QPushButton,
-    QScrollArea, QTextEdit, QVBoxLayout, QWidget
+    QTextEdit, QVBoxLayout, QWidget
 )
 
+AVATAR_SIZE = QSize(150, 150)
+SEARCH_DEBOUNCE_MS = 250
+# Failures after which the feed falls back to the local database.
+API_UNREACHABLE = (requests.ConnectionError, requests.Timeout)
+
 # Theme colors
 COLORS = {
     'bg_primary': "#320B35",
@@ -50,10 +67,16 @@ class Post:
         self.timestamp = datetime.now()
 
 class LoginDialog(QDialog):
-    """Dialog for user login and registration."""
-    def __init__(self, db_path: str, parent=None) -> None:
+    """Dialog for user login and registration.
+
+    Password hashing is slow by design, so both actions run on the
+    background runner; the resulting Session is left in self.session.
+    """
+    def __init__(self, auth: Authenticator, runner: BackgroundRunner, parent=None) -> None:
         super().__init__(parent)
-        self.db_path = db_path
+        self.auth = auth
+        self.runner = runner
+        self.session = None
         self.setWindowFlags(
             Qt.WindowType.Window |
             Qt.WindowType.CustomizeWindowHint |
@@ -88,128 +111,99 @@ class LoginDialog(QDialog):
         self.password.setPlaceholderText("Password")
         layout.addWidget(self.password)
         
+        self.remember = QCheckBox("Remember me")
+        layout.addWidget(self.remember)
+        
         buttons = QHBoxLayout()
         
-        login_btn = QPushButton("Login")
-        login_btn.clicked.connect(self.handle_login)
-        buttons.addWidget(login_btn)
+        self.login_btn = QPushButton("Login")
+        self.login_btn.clicked.connect(self.handle_login)
+        buttons.addWidget(self.login_btn)
         
-        register_btn = QPushButton("Register")
-        register_btn.clicked.connect(self.handle_register)
-        buttons.addWidget(register_btn)
+        self.register_btn = QPushButton("Register")
+        self.register_btn.clicked.connect(self.handle_register)
+        buttons.addWidget(self.register_btn)
         
         layout.addLayout(buttons)
 
+    def set_busy(self, busy: bool) -> None:
+        self.login_btn.setEnabled(not busy)
+        self.register_btn.setEnabled(not busy)
+
     def handle_login(self):
-        conn = sqlite3.connect(self.db_path)
-        cur = conn.cursor()
-        cur.execute("SELECT * FROM users WHERE username=? AND password=?",
-                   (self.username.text(), self.password.text()))
-        user = cur.fetchone()
-        conn.close()
-        
-        if user:
-            self.accept()
-        else:
-            QMessageBox.warning(self, "Error", "Invalid credentials")
+        self.set_busy(True)
+        self.runner.submit(
+            self.auth.login, self.username.text(), self.password.text(),
+            self.remember.isChecked(),
+            on_done=self.logged_in, on_error=self.auth_failed
+        )
             
     def handle_register(self):
-        conn = sqlite3.connect(self.db_path)
-        cur = conn.cursor()
-        try:
-            cur.execute("INSERT INTO users (username, password) VALUES (?, ?)",
-                       (self.username.text(), self.password.text()))
-            conn.commit()
-            QMessageBox.information(self, "Success", "Registration successful!")
-            self.accept()
-        except sqlite3.IntegrityError:
-            QMessageBox.warning(self, "Error", "Username already exists")
-        finally:
-            conn.close()
+        self.set_busy(True)
+        self.runner.submit(
+            self.auth.register, self.username.text(), self.password.text(),
+            self.remember.isChecked(),
+            on_done=self.registered, on_error=self.auth_failed
+        )
+
+    def logged_in(self, session: Session):
+        self.session = session
+        self.accept()
+
+    def registered(self, session: Session):
+        QMessageBox.information(self, "Success", "Registration successful!")
+        self.logged_in(session)
+
+    def auth_failed(self, error):
+        self.set_busy(False)
+        message = str(error) if isinstance(error, AuthError) else f"Database error: {error}"
+        QMessageBox.warning(self, "Error", message)
 
 class SushiSocial(QMainWindow):
     def __init__(self):
         super().__init__()
         self.api_url = "http://localhost:8000"
+        self.api = SushiAPI(self.api_url)
         self.setWindowTitle("Sushi Social")
         self.setStyleSheet(f"background-color: {COLORS['bg_primary']}; color: {COLORS['text_primary']};")
         self.resize(1200, 800)
         
-        self.db_path = "social.db"
+        self.db = Database("social.db")
+        self.feed_cache = FeedCache("feed_cache.json")
+        self.feed_cache.load()
+        self.feed = FeedRepository(self.db)
+        self.search = PostSearch(self.db)
+        self.background = BackgroundRunner(self)
+        self.blobs = BlobStore(BLOB_DIR)
+        self.images = ImagePipeline(self.background)
+        self.writes = WriteBehindQueue(self.db, self.background, self.api, parent=self)
+        self.writes.flushed.connect(self.refresh_post_stats)
+        self.writes.failed.connect(self.rollback_post_stats)
+        self.writes.sync_failed.connect(
+            lambda e: QMessageBox.warning(self, "Error", f"Failed to sync actions: {e}"))
         self.setup_database()
+        self.auth = Authenticator(self.db, default_token_path())
+        self.session = None
         self.current_user = None
+        self.feed_exhausted = False
+        self.search_text = ""
         self.setup_ui()
         self.show_login_dialog()
 
+    def closeEvent(self, event) -> None:
+        """Let in-flight background work finish before closing the database."""
+        # Flush first: shutdown() discards queued tasks, including a
+        # write-behind flush that has not started yet.
+        try:
+            self.writes.flush_sync()
+        finally:
+            self.background.shutdown()
+            self.api.close()
+            self.db.close()
+        super().closeEvent(event)
+
     def setup_database(self):
-        conn = sqlite3.connect(self.db_path, detect_types=sqlite3.PARSE_DECLTYPES)
-        cur = conn.cursor()
-        
-        # Drop existing tables to fix schema
-        cur.execute("DROP TABLE IF EXISTS posts")
-        cur.execute("DROP TABLE IF EXISTS users")
-        
-        # Create users table
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY,
-                username TEXT UNIQUE,
-                password TEXT,
-                bio TEXT DEFAULT '',
-                avatar_path TEXT
-            )
-        """)
-        
-        # Create posts table with user_id instead of author
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS posts (
-                id INTEGER PRIMARY KEY,
-                title TEXT NOT NULL,
-                content TEXT,
-                user_id INTEGER,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        """)
-        
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS comments (
-                id INTEGER PRIMARY KEY,
-                content TEXT NOT NULL,
-                user_id INTEGER,
-                post_id INTEGER,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id),
-                FOREIGN KEY (post_id) REFERENCES posts (id)
-            )
-        """)
-        
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS ratings (
-                id INTEGER PRIMARY KEY,
-                user_id INTEGER,
-                post_id INTEGER,
-                rating INTEGER CHECK(rating IN (1,2,3,4,5)),
-                FOREIGN KEY (user_id) REFERENCES users (id),
-                FOREIGN KEY (post_id) REFERENCES posts (id),
-                UNIQUE(user_id, post_id)
-            )
-        """)
-        
-        # Add likes/dislikes tables
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS post_reactions (
-                id INTEGER PRIMARY KEY,
-                post_id INTEGER,
-                user_id INTEGER,
-                is_like BOOLEAN,
-                FOREIGN KEY (post_id) REFERENCES posts (id),
-                FOREIGN KEY (user_id) REFERENCES users (id),
-                UNIQUE(post_id, user_id)
-            )
-        """)
-        conn.commit()
-        conn.close()
+        migrate(self.db)
 
     def setup_ui(self):
         main_widget = QWidget()
@@ -242,18 +236,34 @@ class SushiSocial(QMainWindow):
         avatar_btn.clicked.connect(self.change_avatar)
         profile_layout.addWidget(avatar_btn)
         
+        logout_btn = QPushButton("Log Out")
+        logout_btn.clicked.connect(self.log_out)
+        profile_layout.addWidget(logout_btn)
+        
         layout.addWidget(profile_panel)
         
         # Posts panel setup
         posts_panel = QWidget()
         posts_layout = QVBoxLayout(posts_panel)
         
-        scroll = QScrollArea()
-        scroll.setWidgetResizable(True)
-        self.posts_widget = QWidget()
-        self.posts_area = QVBoxLayout(self.posts_widget)
-        scroll.setWidget(self.posts_widget)
-        posts_layout.addWidget(scroll)
+        # Search box, queried once typing pauses
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Search posts and comments...")
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.run_search)
+        self.search_input.textChanged.connect(self.search_timer.start)
+        posts_layout.addWidget(self.search_input)
+        
+        self.feed_model = FeedModel(self)
+        self.feed_view = FeedView(COLORS)
+        self.feed_view.setModel(self.feed_model)
+        self.feed_view.delegate.rate_requested.connect(self.rate_post)
+        self.feed_view.delegate.reaction_requested.connect(self.handle_reaction)
+        self.feed_view.delegate.comment_requested.connect(self.prompt_comment)
+        self.feed_view.near_bottom.connect(self.load_more_posts)
+        posts_layout.addWidget(self.feed_view)
         
         new_post_btn = QPushButton("New Post")
         new_post_btn.clicked.connect(self.show_new_post_dialog)
@@ -267,77 +277,233 @@ class SushiSocial(QMainWindow):
             "Images (*.png *.jpg *.jpeg)"
         )
         if file_name:
-            pixmap = QPixmap(file_name).scaled(
-                150, 150, 
-                Qt.AspectRatioMode.KeepAspectRatio,
-                Qt.TransformationMode.SmoothTransformation
-            )
-            self.avatar_label.setPixmap(pixmap)
-            
-            # Save to database
-            conn = sqlite3.connect(self.db_path)
-            cur = conn.cursor()
-            cur.execute(
-                "UPDATE users SET avatar_path=? WHERE username=?",
-                (file_name, self.current_user.username)
+            self.images.thumbnail(file_name, AVATAR_SIZE, self.avatar_label.setPixmap)
+            self.background.submit(self.save_avatar, file_name, on_error=self.show_db_error)
+
+    def save_avatar(self, file_name):
+        """Worker thread: copy the avatar into the blob store and record its hash."""
+        digest = self.blobs.put_file(file_name)
+        with self.db.transaction() as conn:
+            conn.execute(
+                "UPDATE users SET avatar_hash=? WHERE id=?",
+                (digest, self.session.user_id)
             )
-            conn.commit()
-            conn.close()
-
-    def load_user_profile(self, username):
-        conn = sqlite3.connect(self.db_path)
-        cur = conn.cursor()
-        cur.execute(
-            "SELECT bio, avatar_path FROM users WHERE username=?",
-            (username,)
-        )
-        result = cur.fetchone()
-        conn.close()
-        
-        if result:
-            self.bio_edit.setText(result[0] or "")
-            if result[1]:  # Avatar path
-                pixmap = QPixmap(result[1]).scaled(
-                    150, 150,
-                    Qt.AspectRatioMode.KeepAspectRatio,
-                    Qt.TransformationMode.SmoothTransformation
-                )
-                self.avatar_label.setPixmap(pixmap)
+        self.session.avatar_hash = digest
+        return digest
+
+    def load_user_profile(self):
+        """Show the profile cached on the session; no query is needed."""
+        self.bio_edit.setText(self.session.bio)
+        self.avatar_label.clear()
+        avatar_hash = self.session.avatar_hash
+        if avatar_hash and self.blobs.has(avatar_hash):
+            self.images.thumbnail(self.blobs.path(avatar_hash), AVATAR_SIZE,
+                                  self.avatar_label.setPixmap)
 
     def show_login_dialog(self):
-        dialog = LoginDialog(self.db_path, self)
-        if dialog.exec() == QDialog.DialogCode.Accepted:
-            self.current_user = Profile(dialog.username.text())
-            self.username_label.setText(self.current_user.username)
-            self.load_user_profile(self.current_user.username)
-            self.load_posts()
+        """Resume a remembered login, or ask for credentials."""
+        session = self.auth.resume()
+        if session is None:
+            dialog = LoginDialog(self.auth, self.background, self)
+            if dialog.exec() != QDialog.DialogCode.Accepted:
+                return
+            session = dialog.session
+        self.start_session(session)
+
+    def start_session(self, session: Session):
+        self.session = session
+        self.current_user = Profile(session.username, session.bio)
+        self.current_user.avatar = session.avatar_hash
+        self.feed.viewer = session.user_id
+        self.writes.username = session.username
+        self.username_label.setText(session.username)
+        self.load_user_profile()
+        self.show_cached_posts()
+        self.load_posts()
+
+    def log_out(self):
+        """Write the session's queued actions off the GUI thread, then end it."""
+        if self.session is None:
+            return
+        # Disabled until the flush is done, so no action is queued for a
+        # session that is ending.
+        self.setEnabled(False)
+        self.writes.drain(self.finish_log_out)
+
+    def finish_log_out(self):
+        self.setEnabled(True)
+        self.auth.logout(self.session)
+        self.session = None
+        self.current_user = None
+        self.feed.viewer = None
+        self.writes.username = None
+        self.username_label.setText("Guest")
+        self.bio_edit.clear()
+        self.avatar_label.clear()
+        self.show_login_dialog()
 
     def create_post(self, title: str, content: str):
+        return self.background.submit(
+            self.send_post, title, content,
+            on_done=lambda _: self.load_new_posts(),
+            on_error=lambda e: QMessageBox.critical(self, "Error", f"Failed to create post: {e}")
+        )
+
+    def send_post(self, title: str, content: str) -> dict:
+        """Worker thread: publish a post through the API."""
+        return self.api.create_post(title, content, self.current_user.username)
+
+    def load_posts(self, since_id=None):
+        """Fetch the feed off the GUI thread; with since_id only newer posts are requested.
+
+        A full load only fetches the first page and supersedes any feed load
+        still in flight; older pages are loaded by load_more_posts.
+        """
+        if since_id is None:
+            self.background.cancel('feed-delta')
+            self.background.cancel('feed-page')
+            self.feed_exhausted = False
+        self.background.submit(
+            self.fetch_posts, since_id,
+            key='feed' if since_id is None else 'feed-delta',
+            on_done=self.apply_posts,
+            on_error=lambda e: QMessageBox.critical(self, "Error", f"Failed to load posts: {e}")
+        )
+
+    def fetch_posts(self, since_id=None):
+        """Worker thread: download posts and read their stats from SQLite.
+
+        The first page is revalidated against the cached ETag; when the
+        server reports it unchanged, no posts are returned and nothing is
+        re-rendered. While the API is unreachable the first page is read
+        from the local database instead.
+        """
+        if since_id is None:
+            try:
+                posts, etag = self.api.list_posts_if_changed(self.feed_cache.validator(),
+                                                             limit=PAGE_SIZE)
+            except API_UNREACHABLE:
+                posts = self.feed.page_posts(None, PAGE_SIZE)
+                return since_id, posts, self.feed.post_stats(post[3] for post in posts)
+            if posts is None:
+                return since_id, None, None
+            self.feed_cache.store_feed(posts, etag)
+            self.feed_cache.save()
+        else:
+            posts = self.api.list_posts(since_id)
+        return since_id, posts, self.feed.post_stats(post[3] for post in posts)
+
+    def apply_posts(self, result):
+        since_id, posts, stats = result
+        # Feed posts must not be mixed into search results.
+        if posts is None or self.search_text:
+            return
+        if since_id is None:
+            self.background.cancel('feed-cache')
+            self.feed_exhausted = len(posts) < PAGE_SIZE
+            self.update_posts_display(posts, stats)
+        else:
+            self.merge_posts_display(posts, stats)
+
+    def run_search(self):
+        """Show search results for the search box, or the feed again once it is cleared."""
+        self.search_text = self.search_input.text().strip()
+        self.background.cancel('search-page')
+        if not self.search_text:
+            # Repaint the feed from the cache first: load_posts revalidates
+            # with its ETag and leaves the model alone on 304 Not Modified.
+            self.background.cancel('search')
+            self.show_cached_posts()
+            self.load_posts()
+            return
+        self.background.cancel('feed-cache')
+        self.background.cancel('feed')
+        self.background.cancel('feed-delta')
+        self.background.cancel('feed-page')
+        self.feed_exhausted = False
+        self.background.submit(
+            self.fetch_search, self.search_text, 0,
+            key='search',
+            on_done=self.apply_search,
+            on_error=self.show_db_error
+        )
+
+    def fetch_search(self, text, offset):
+        """Worker thread: run the FTS query and read stats for the matches."""
+        posts = self.search.search(text, SEARCH_PAGE_SIZE, offset)
+        return text, offset, posts, self.feed.post_stats(post[3] for post in posts)
+
+    def apply_search(self, result):
+        text, offset, posts, stats = result
+        if text != self.search_text:
+            return
+        self.feed_exhausted = len(posts) < SEARCH_PAGE_SIZE
+        if offset == 0:
+            self.update_posts_display(posts, stats)
+        else:
+            self.feed_model.append_posts(posts, stats)
+
+    def load_more_posts(self):
+        """Prefetch the page after the oldest loaded post, one request at a time."""
+        if self.search_text:
+            busy = self.background.pending('search') or self.background.pending('search-page')
+            if not self.feed_exhausted and not busy:
+                self.background.submit(
+                    self.fetch_search, self.search_text, self.feed_model.rowCount(),
+                    key='search-page',
+                    on_done=self.apply_search,
+                    on_error=self.show_db_error
+                )
+            return
+        cursor = self.feed_model.last_cursor()
+        if self.feed_exhausted or cursor is None or self.background.pending('feed-page'):
+            return
+        self.background.submit(
+            self.fetch_page, cursor,
+            key='feed-page',
+            on_done=self.apply_page,
+            on_error=lambda e: QMessageBox.critical(self, "Error", f"Failed to load posts: {e}")
+        )
+
+    def fetch_page(self, cursor):
+        """Worker thread: download the page of posts older than cursor, or read it locally."""
         try:
-            response = requests.post(
-                f"{self.api_url}/posts",
-                params={
-                    "title": title,
-                    "content": content,
-                    "username": self.current_user.username
-                }
-            )
-            if response.status_code == 200:
-                self.load_posts()
-                return True
-            return False
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to create post: {e}")
-            return False
-
-    def load_posts(self):
-        try:
-            response = requests.get(f"{self.api_url}/posts")
-            if response.status_code == 200:
-                posts = response.json()
-                self.update_posts_display(posts)
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to load posts: {e}")
+            posts = self.api.list_posts(cursor=cursor, limit=PAGE_SIZE)
+        except API_UNREACHABLE:
+            posts = self.feed.page_posts(cursor, PAGE_SIZE)
+        return posts, self.feed.post_stats(post[3] for post in posts)
+
+    def apply_page(self, result):
+        posts, stats = result
+        self.feed_exhausted = len(posts) < PAGE_SIZE
+        self.feed_model.append_posts(posts, stats)
+
+    def show_cached_posts(self):
+        """Paint the last known feed from the disk cache before the network answers."""
+        self.background.submit(
+            self.fetch_cached_posts,
+            key='feed-cache',
+            on_done=self.apply_cached_posts,
+            on_error=self.show_db_error
+        )
+
+    def fetch_cached_posts(self):
+        """Worker thread: read the cached feed and its stats from SQLite."""
+        posts = self.feed_cache.cached_feed()
+        return posts, self.feed.post_stats(post[3] for post in posts)
+
+    def apply_cached_posts(self, result):
+        posts, stats = result
+        if not self.search_text:
+            self.update_posts_display(posts, stats)
+
+    def load_new_posts(self):
+        """Add posts newer than the feed, or re-run the search so a new match shows up."""
+        if self.search_text:
+            self.run_search()
+            return
+        since_id = self.feed_model.last_post_id()
+        self.load_posts(since_id)
 
     def show_new_post_dialog(self):
         dialog = QDialog(self)
@@ -377,34 +543,33 @@ class SushiSocial(QMainWindow):
         content_input.setPlaceholderText("Write your post...")
         layout.addWidget(content_input)
         
+        user_id = self.session.user_id
+
+        def insert_post(title, content):
+            with self.db.transaction() as conn:
+                conn.execute("""
+                    INSERT INTO posts (title, content, user_id, timestamp)
+                    VALUES (?, ?, ?, ?)
+                """, (title, content, user_id, datetime.now()))
+
+        def post_created(_):
+            self.load_new_posts()
+            dialog.accept()
+
         def create_post():
             if not title_input.text() or not content_input.toPlainText():
                 QMessageBox.warning(dialog, "Error", "Title and content required")
                 return
-                
-            conn = sqlite3.connect(self.db_path)
-            cur = conn.cursor()
-            try:
-                cur.execute("SELECT id FROM users WHERE username = ?", 
-                           (self.current_user.username,))
-                user_id = cur.fetchone()[0]
-                
-                cur.execute("""
-                    INSERT INTO posts (title, content, user_id, timestamp)
-                    VALUES (?, ?, ?, ?)
-                """, (
-                    title_input.text(),
-                    content_input.toPlainText(),
-                    user_id,
-                    datetime.now()
-                ))
-                conn.commit()
-                self.load_posts()
-                dialog.accept()
-            except sqlite3.Error as e:
-                QMessageBox.critical(dialog, "Error", f"Failed to create post: {e}")
-            finally:
-                conn.close()
+            
+            post_btn.setEnabled(False)
+            self.background.submit(
+                insert_post, title_input.text(), content_input.toPlainText(),
+                on_done=post_created,
+                on_error=lambda e: (
+                    post_btn.setEnabled(True),
+                    QMessageBox.critical(dialog, "Error", f"Failed to create post: {e}")
+                )
+            )
         
         post_btn = QPushButton("Post")
         post_btn.clicked.connect(create_post)
@@ -412,152 +577,61 @@ class SushiSocial(QMainWindow):
         
         dialog.exec()
 
-    def update_posts_display(self, posts):
-        # Clear existing posts
-        while self.posts_area.count():
-            item = self.posts_area.takeAt(0)
-            widget = item.widget()
-            if widget:
-                widget.deleteLater()
-        
-        for post in posts:
-            post_widget = QFrame()
-            post_widget.setStyleSheet(f"background-color: {COLORS['light_gray']}; border-radius: 10px; padding: 10px;")
-            post_layout = QVBoxLayout(post_widget)
-            
-            # Post header with title and author
-            header_layout = QHBoxLayout()
-            title_label = QLabel(post[0])
-            title_label.setStyleSheet("font-size: 16px; font-weight: bold;")
-            header_layout.addWidget(title_label)
-            post_layout.addLayout(header_layout)
-            
-            # Rating stars
-            rating_layout = QHBoxLayout()
-            for i in range(5):
-                star_btn = QPushButton("★")
-                star_btn.setFixedSize(30, 30)
-                star_btn.clicked.connect(lambda x, p=post[3], r=i+1: self.rate_post(p, r))
-                rating_layout.addWidget(star_btn)
-            post_layout.addLayout(rating_layout)
-            
-            # Content with preserved line breaks
-            content_label = QLabel(post[1].replace('\n', '<br>'))
-            content_label.setWordWrap(True)
-            content_label.setTextFormat(Qt.TextFormat.RichText)
-            post_layout.addWidget(content_label)
-            
-            # Reactions layout
-            reactions = QHBoxLayout()
-            
-            like_count = self.get_reaction_count(post[3], True)
-            dislike_count = self.get_reaction_count(post[3], False)
-            
-            like_btn = QPushButton(f"👍 {like_count}")
-            like_btn.clicked.connect(lambda x, p=post[3]: self.handle_reaction(p, True))
-            
-            dislike_btn = QPushButton(f"👎 {dislike_count}")
-            dislike_btn.clicked.connect(lambda x, p=post[3]: self.handle_reaction(p, False))
-            
-            reactions.addWidget(like_btn)
-            reactions.addWidget(dislike_btn)
-            post_layout.addLayout(reactions)
-            
-            # Comments section
-            comments_widget = QWidget()
-            comments_layout = QVBoxLayout(comments_widget)
-            
-            # Add comment
-            comment_input = QLineEdit()
-            comment_input.setPlaceholderText("Add a comment...")
-            comment_btn = QPushButton("Comment")
-            comment_btn.clicked.connect(
-                lambda: self.add_comment(post[3], comment_input.text())
-            )
-            
-            comments_layout.addWidget(comment_input)
-            comments_layout.addWidget(comment_btn)
-            
-            # Show existing comments
-            for comment in self.get_comments(post[3]):
-                comment_label = QLabel(f"{comment[1]}: {comment[0]}")
-                comments_layout.addWidget(comment_label)
-                
-            post_layout.addWidget(comments_widget)
-            self.posts_area.addWidget(post_widget)
+    def update_posts_display(self, posts, stats):
+        """Show posts with stats already read on the background runner."""
+        self.feed_model.set_posts(posts, stats)
+
+    def merge_posts_display(self, posts, stats):
+        self.feed_model.merge_posts(posts, stats)
+
+    def apply_post_stats(self, stats):
+        """Patch the row of the post the stats belong to."""
+        self.feed_model.update_stats(stats.post_id, stats)
+
+    def show_db_error(self, error):
+        QMessageBox.critical(self, "Error", f"Database error: {error}")
+
+    def prompt_comment(self, post_id):
+        content, ok = QInputDialog.getText(self, "Comment", "Add a comment...")
+        if ok:
+            self.add_comment(post_id, content)
+
+    def apply_optimistic(self, post_id, change):
+        """Show the expected result of a queued write before it is committed."""
+        stats = self.feed_model.stats(post_id)
+        if stats is None:
+            return
+        self.writes.remember(post_id, stats)
+        self.feed_model.update_stats(post_id, change(stats))
+
+    def refresh_post_stats(self, post_ids):
+        """Replace optimistic stats with the committed counters."""
+        self.background.submit(self.feed.post_stats, post_ids,
+                               on_done=self.apply_refreshed_stats)
+
+    def apply_refreshed_stats(self, stats):
+        for post_stats in stats.values():
+            self.apply_post_stats(post_stats)
+
+    def rollback_post_stats(self, error, originals):
+        for post_id, stats in originals.items():
+            self.feed_model.update_stats(post_id, stats)
+        self.show_db_error(error)
 
     def rate_post(self, post_id, rating):
-        conn = sqlite3.connect(self.db_path)
-        cur = conn.cursor()
-        try:
-            cur.execute("""
-                INSERT OR REPLACE INTO ratings (user_id, post_id, rating)
-                VALUES ((SELECT id FROM users WHERE username = ?), ?, ?)
-            """, (self.current_user.username, post_id, rating))
-            conn.commit()
-        finally:
-            conn.close()
-        self.load_posts()
+        self.apply_optimistic(post_id, lambda stats: stats.with_rating(rating))
+        self.writes.rating(post_id, self.session.user_id, rating)
 
     def handle_reaction(self, post_id, is_like):
-        conn = sqlite3.connect(self.db_path)
-        cur = conn.cursor()
-        try:
-            # Get user_id
-            cur.execute("SELECT id FROM users WHERE username = ?", 
-                       (self.current_user.username,))
-            user_id = cur.fetchone()[0]
-            
-            # Toggle reaction
-            cur.execute("""
-                INSERT OR REPLACE INTO post_reactions (post_id, user_id, is_like)
-                VALUES (?, ?, ?)
-            """, (post_id, user_id, is_like))
-            conn.commit()
-        finally:
-            conn.close()
-        self.load_posts()
-
-    def get_reaction_count(self, post_id, is_like):
-        conn = sqlite3.connect(self.db_path)
-        cur = conn.cursor()
-        cur.execute("""
-            SELECT COUNT(*) FROM post_reactions 
-            WHERE post_id = ? AND is_like = ?
-        """, (post_id, is_like))
-        count = cur.fetchone()[0]
-        conn.close()
-        return count
+        self.apply_optimistic(post_id, lambda stats: stats.with_reaction(is_like))
+        self.writes.reaction(post_id, self.session.user_id, is_like)
 
     def add_comment(self, post_id, content):
         if not content.strip():
             return
-            
-        conn = sqlite3.connect(self.db_path)
-        cur = conn.cursor()
-        try:
-            cur.execute("""
-                INSERT INTO comments (content, user_id, post_id)
-                VALUES (?, (SELECT id FROM users WHERE username = ?), ?)
-            """, (content, self.current_user.username, post_id))
-            conn.commit()
-        finally:
-            conn.close()
-        self.load_posts()
-
-    def get_comments(self, post_id):
-        conn = sqlite3.connect(self.db_path)
-        cur = conn.cursor()
-        cur.execute("""
-            SELECT c.content, u.username 
-            FROM comments c
-            JOIN users u ON c.user_id = u.id
-            WHERE c.post_id = ?
-            ORDER BY c.timestamp DESC
-        """, (post_id,))
-        comments = cur.fetchall()
-        conn.close()
-        return comments
+        username = self.session.username
+        self.apply_optimistic(post_id, lambda stats: stats.with_comment(content, username))
+        self.writes.comment(post_id, self.session.user_id, content)
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
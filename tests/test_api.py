@@ -0,0 +1,141 @@
+"""SushiAPI against a stand-in posts API served from 127.0.0.1."""
+
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from api import APIError, SushiAPI
+
+POSTS = [["Title", "Content", "sam", 2, "2024-01-01 00:00:01"],
+         ["Older", "Content", "kim", 1, "2024-01-01 00:00:00"]]
+ETAG = '"feed-2"'
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.record(self)
+        if self.server.failures:
+            self.server.failures -= 1
+            self.respond(503, {})
+        elif self.headers.get('If-None-Match') == ETAG:
+            self.respond(304)
+        else:
+            self.respond(200, POSTS, {'ETag': ETAG})
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.server.record(self, body)
+        if self.server.failures:
+            self.server.failures -= 1
+            self.respond(503, {})
+        elif self.path == '/batch':
+            self.respond(200, {'results': [{'ok': True} for _ in body['actions']]})
+        else:
+            self.respond(201, dict(body, id=3))
+
+    def respond(self, status, body=None, headers=None):
+        data = b'' if body is None else json.dumps(body).encode()
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if body is not None:
+            self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StandInHandler)
+        self.requests = []
+        self.failures = 0
+
+    def record(self, handler, body=None):
+        self.requests.append({
+            'method': handler.command,
+            'path': handler.path,
+            'client_port': handler.client_address[1],
+            'content_type': handler.headers.get('Content-Type'),
+            'body': body,
+        })
+
+
+class SushiAPITest(unittest.TestCase):
+    def setUp(self):
+        self.server = StandInServer()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.api = SushiAPI(f"http://127.0.0.1:{self.server.server_address[1]}", backoff=0)
+
+    def tearDown(self):
+        self.api.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_requests_reuse_one_connection(self):
+        for _ in range(3):
+            self.assertEqual(self.api.list_posts(), POSTS)
+        ports = {request['client_port'] for request in self.server.requests}
+        self.assertEqual(len(ports), 1)
+
+    def test_list_posts_query_parameters(self):
+        self.api.list_posts(cursor=("2024-01-01 00:00:01", 2), limit=50)
+        self.api.list_posts(since_id=1)
+        paths = [request['path'] for request in self.server.requests]
+        self.assertEqual(paths, [
+            '/posts?before_timestamp=2024-01-01+00%3A00%3A01&before_id=2&limit=50',
+            '/posts?since_id=1',
+        ])
+
+    def test_get_is_retried_on_unavailable(self):
+        self.server.failures = 2
+        self.assertEqual(self.api.list_posts(), POSTS)
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_post_is_not_retried(self):
+        self.server.failures = 1
+        with self.assertRaises(APIError) as caught:
+            self.api.create_post("Title", "Content", "sam")
+        self.assertEqual(caught.exception.status_code, 503)
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_create_post_sends_json_body(self):
+        created = self.api.create_post("Title", "Content", "sam")
+        request = self.server.requests[0]
+        self.assertEqual(request['content_type'], 'application/json')
+        self.assertEqual(request['body'], {'title': "Title", 'content': "Content", 'username': "sam"})
+        self.assertEqual(created['id'], 3)
+
+    def test_unchanged_feed_returns_none(self):
+        posts, etag = self.api.list_posts_if_changed(limit=50)
+        self.assertEqual((posts, etag), (POSTS, ETAG))
+        posts, etag = self.api.list_posts_if_changed(ETAG, limit=50)
+        self.assertIsNone(posts)
+        self.assertEqual(etag, ETAG)
+
+    def test_batch_sends_actions_in_one_request(self):
+        actions = [
+            {"type": "reaction", "post_id": 1, "username": "sam", "is_like": True},
+            {"type": "comment", "post_id": 2, "username": "sam", "content": "Nice"},
+        ]
+        results = self.api.batch(actions)
+        self.assertEqual(len(results), 2)
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(self.server.requests[0]['path'], '/batch')
+        self.assertEqual(self.server.requests[0]['body'], {'actions': actions})
+
+    def test_empty_batch_sends_nothing(self):
+        self.assertEqual(self.api.batch([]), [])
+        self.assertEqual(self.server.requests, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,230 @@
+"""Append-only, segment-rotated log of thread messages for catch-up replay.
+
+Every thread gets a monotonically increasing sequence number. Entries are
+stored exactly as they go on the wire (length prefix plus payload) in
+segment files named after the first sequence number they hold, so a
+range of entries is one contiguous byte range that can be sent as-is. The
+most recent entries are also kept in an in-memory ring. Catch-up for a
+client that was only briefly away is served from there, and older ranges
+are read through mmap without loading whole segments.
+
+The sequence number of entry k in a segment is ``first_seq + k``, so no
+per-record index is stored on disk; a sparse in-memory index of offsets
+makes seeking into a segment cheap.
+"""
+
+import mmap
+import os
+import threading
+from collections import deque
+
+from framing import HEADER, HEADER_SIZE, Frame
+
+SEGMENT_SUFFIX = '.seg'
+SEGMENT_BYTES = 64 * 1024 * 1024
+RING_SIZE = 4096
+INDEX_STRIDE = 256
+
+
+class Segment:
+    """One segment file and a sparse index of record offsets within it."""
+    def __init__(self, directory: str, first_seq: int) -> None:
+        self.first_seq = first_seq
+        self.path = os.path.join(directory, f"{first_seq:020d}{SEGMENT_SUFFIX}")
+        # offsets[i] is the byte offset of entry first_seq + i * INDEX_STRIDE.
+        self.offsets = [0]
+        self.size = 0
+        self.count = 0
+        self._index_lock = threading.Lock()
+
+    def record_appended(self, length: int) -> None:
+        if self.count and self.count % INDEX_STRIDE == 0:
+            self.offsets.append(self.size)
+        self.size += HEADER_SIZE + length
+        self.count += 1
+
+    def seek(self, buffer, seq: int, limit: int, sealed: bool) -> int:
+        """Offset of entry seq in buffer, walking forward from the nearest indexed entry.
+
+        Offsets found on the way are added to the index of sealed
+        segments; the active segment's index is maintained by appends.
+        """
+        position = seq - self.first_seq
+        slot = min(position // INDEX_STRIDE, len(self.offsets) - 1)
+        offset = self.offsets[slot]
+        for current in range(slot * INDEX_STRIDE + 1, position + 1):
+            if offset + HEADER_SIZE > limit:
+                break
+            offset += HEADER_SIZE + HEADER.unpack_from(buffer, offset)[0]
+            if sealed and current % INDEX_STRIDE == 0:
+                with self._index_lock:
+                    if len(self.offsets) == current // INDEX_STRIDE:
+                        self.offsets.append(offset)
+        return offset
+
+
+class ThreadLog:
+    """Sequenced thread log with an in-memory ring of the newest entries.
+
+    ``append`` and ``read`` are safe to call from several threads. Writes
+    go straight to the file without user-space buffering, so a segment on
+    disk always holds every entry older than the ring; ``fsync`` also
+    forces them to stable storage at the cost of append latency.
+    ``max_segments`` bounds disk usage by deleting the oldest segments.
+    """
+    def __init__(self, directory: str = 'threadlog', segment_bytes: int = SEGMENT_BYTES,
+                 ring_size: int = RING_SIZE, max_segments: int = None,
+                 fsync: bool = False) -> None:
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        self.fsync = fsync
+        self._ring = deque(maxlen=ring_size)
+        self._lock = threading.Lock()
+        self._fd = None
+        os.makedirs(directory, exist_ok=True)
+        self._segments = self._recover()
+        active = self._segments[-1] if self._segments else None
+        self.next_seq = active.first_seq + active.count if active else 1
+
+    @property
+    def last_seq(self) -> int:
+        """Sequence number of the newest entry, 0 when the log is empty."""
+        return self.next_seq - 1
+
+    @property
+    def first_seq(self) -> int:
+        """Sequence number of the oldest entry still retained."""
+        return self._segments[0].first_seq if self._segments else self.next_seq
+
+    def _recover(self) -> list:
+        """Find existing segments and cut a torn record off the end of the last one."""
+        first_seqs = sorted(
+            int(name[:-len(SEGMENT_SUFFIX)]) for name in os.listdir(self.directory)
+            if name.endswith(SEGMENT_SUFFIX) and name[:-len(SEGMENT_SUFFIX)].isdigit()
+        )
+        segments = [Segment(self.directory, first_seq) for first_seq in first_seqs]
+        for segment, following in zip(segments, segments[1:]):
+            segment.count = following.first_seq - segment.first_seq
+            segment.size = os.path.getsize(segment.path)
+        if segments:
+            active = segments[-1]
+            with open(active.path, 'r+b') as f:
+                data = f.read()
+                offset = 0
+                while offset + HEADER_SIZE <= len(data):
+                    (length,) = HEADER.unpack_from(data, offset)
+                    if offset + HEADER_SIZE + length > len(data):
+                        break
+                    active.record_appended(length)
+                    offset += HEADER_SIZE + length
+                if offset < len(data):
+                    f.truncate(offset)
+        return segments
+
+    def append(self, encode) -> tuple:
+        """Assign the next sequence number and store ``encode(seq)``.
+
+        encode is called under the log lock so payloads land on disk in
+        sequence order. Returns ``(seq, payload)``.
+        """
+        with self._lock:
+            seq = self.next_seq
+            payload = encode(seq)
+            frame = Frame(payload)
+            if self._fd is None:
+                self._open_active(seq)
+            segment = self._segments[-1]
+            self._write(frame.buffers)
+            segment.record_appended(len(payload))
+            self.next_seq = seq + 1
+            self._ring.append((seq, frame))
+            if segment.size >= self.segment_bytes:
+                self._rotate()
+        return seq, payload
+
+    def _open_active(self, seq: int) -> None:
+        if not self._segments or self._segments[-1].size >= self.segment_bytes:
+            self._segments.append(Segment(self.directory, seq))
+        self._fd = os.open(self._segments[-1].path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+
+    def _write(self, buffers) -> None:
+        pending = [memoryview(buffer) for buffer in buffers]
+        while pending:
+            written = os.writev(self._fd, pending)
+            while written:
+                if written >= len(pending[0]):
+                    written -= len(pending.pop(0))
+                else:
+                    pending[0] = pending[0][written:]
+                    written = 0
+        if self.fsync:
+            os.fsync(self._fd)
+
+    def _rotate(self) -> None:
+        os.close(self._fd)
+        self._fd = None
+        if self.max_segments is not None:
+            while len(self._segments) > self.max_segments:
+                os.unlink(self._segments.pop(0).path)
+
+    def read(self, after_seq: int, max_bytes: int) -> tuple:
+        """Return ``(buffers, last_seq)`` for entries newer than after_seq.
+
+        buffers hold wire-encoded frames totalling about max_bytes (always
+        at least one entry when any exist); last_seq is the newest entry
+        included, or after_seq when there is nothing to send. Entries
+        before ``first_seq`` are gone; callers check that first.
+        """
+        with self._lock:
+            head = self.next_seq
+            ring = list(self._ring)
+            segments = list(self._segments)
+        start = max(after_seq + 1, segments[0].first_seq if segments else head)
+        ring_start = ring[0][0] if ring else head
+        buffers = []
+        budget = max_bytes
+        seq = start
+        if seq < ring_start:
+            seq, budget = self._read_segments(segments, seq, ring_start, budget, buffers)
+        for entry_seq, frame in ring:
+            if budget <= 0 and buffers:
+                break
+            if entry_seq < seq:
+                continue
+            if entry_seq > seq:
+                break
+            buffers.extend(frame.buffers)
+            budget -= len(frame)
+            seq += 1
+        return buffers, seq - 1
+
+    def _read_segments(self, segments, seq, stop, budget, buffers) -> tuple:
+        """Append entries [seq, stop) from disk to buffers until budget runs out."""
+        for index, segment in enumerate(segments):
+            end_seq = segments[index + 1].first_seq if index + 1 < len(segments) else stop
+            if seq >= end_seq or seq >= stop or (budget <= 0 and buffers):
+                continue
+            with open(segment.path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                if not size:
+                    continue
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                    sealed = index + 1 < len(segments)
+                    begin = offset = segment.seek(view, seq, size, sealed)
+                    while seq < min(end_seq, stop) and offset + HEADER_SIZE <= size:
+                        if budget <= 0 and offset > begin:
+                            break
+                        record = HEADER_SIZE + HEADER.unpack_from(view, offset)[0]
+                        offset += record
+                        budget -= record
+                        seq += 1
+                    if offset > begin:
+                        buffers.append(view[begin:offset])
+        return seq, budget
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
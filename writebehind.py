@@ -0,0 +1,263 @@
+"""Write-behind batching of reactions, ratings and comments.
+
+User actions are queued in memory and written together in one
+transaction, either after a short delay or once enough of them pile up.
+Repeated reactions or ratings of the same post by the same user collapse
+to the final value, so a burst of like/dislike toggles costs one row
+write and one commit. The UI is patched optimistically when an action is
+queued; the queue remembers each post's stats from before its first
+pending change so a failed flush can roll the UI back.
+
+The local database is the source of truth. Once a batch is committed it
+is also sent to the posts API in a single /batch request; a failure
+there is reported through ``sync_failed`` and does not undo the local
+write.
+"""
+
+import threading
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+from database import Database
+
+REACTION_SQL = """
+    INSERT OR REPLACE INTO post_reactions (post_id, user_id, is_like)
+    VALUES (?, ?, ?)
+"""
+
+RATING_SQL = """
+    INSERT OR REPLACE INTO ratings (user_id, post_id, rating)
+    VALUES (?, ?, ?)
+"""
+
+COMMENT_SQL = """
+    INSERT INTO comments (content, user_id, post_id)
+    VALUES (?, ?, ?)
+"""
+
+# flush_sync runs on the GUI thread at shutdown, so its API call gets one
+# short attempt: (connect, read) seconds, no retries.
+SHUTDOWN_SYNC_TIMEOUT = (1, 2)
+
+
+class PendingWrites:
+    """One batch of coalesced actions plus the pre-change stats of the posts it touches."""
+    def __init__(self) -> None:
+        self.reactions = {}
+        self.ratings = {}
+        self.comments = []
+        self.originals = {}
+        self.username = None
+        self.written = False
+
+    def actions(self) -> list:
+        """The batch as SushiAPI.batch actions, attributed to self.username."""
+        actions = [
+            {"type": "reaction", "post_id": post_id, "username": self.username,
+             "is_like": bool(is_like)}
+            for (post_id, _), is_like in self.reactions.items()
+        ]
+        actions.extend(
+            {"type": "rating", "post_id": post_id, "username": self.username, "rating": rating}
+            for (post_id, _), rating in self.ratings.items()
+        )
+        actions.extend(
+            {"type": "comment", "post_id": post_id, "username": self.username, "content": content}
+            for post_id, _, content in self.comments
+        )
+        return actions
+
+    def post_ids(self) -> set:
+        ids = {post_id for post_id, _ in self.reactions}
+        ids.update(post_id for post_id, _ in self.ratings)
+        ids.update(post_id for post_id, _, _ in self.comments)
+        return ids
+
+    def __len__(self) -> int:
+        return len(self.reactions) + len(self.ratings) + len(self.comments)
+
+
+class WriteBehindQueue(QObject):
+    """Coalesces user actions and flushes them in one background transaction.
+
+    Only one flush runs at a time so batches commit in the order they were
+    queued. ``flushed`` carries the set of post ids that were written;
+    ``failed`` carries the error and the post id -> original stats mapping
+    to restore; ``sync_failed`` carries the error of a batch the API
+    rejected. Set ``username`` to the logged-in user before queueing
+    actions that should reach the API.
+    """
+    flushed = pyqtSignal(object)
+    failed = pyqtSignal(object, object)
+    sync_failed = pyqtSignal(object)
+
+    def __init__(self, db: Database, runner, api=None, delay_ms: int = 300,
+                 max_pending: int = 50, parent=None) -> None:
+        super().__init__(parent)
+        self.db = db
+        self.runner = runner
+        self.api = api
+        self.username = None
+        self.max_pending = max_pending
+        self._pending = PendingWrites()
+        self._in_flight = None
+        self._task = None
+        self._draining = []
+        self._drain_task = None
+        self._write_lock = threading.Lock()
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(delay_ms)
+        self._timer.timeout.connect(self.flush)
+
+    def remember(self, post_id: int, stats) -> None:
+        """Record stats as they were before the first optimistic change to post_id."""
+        self._pending.originals.setdefault(post_id, stats)
+
+    def reaction(self, post_id: int, user_id: int, is_like: bool) -> None:
+        self._pending.reactions[(post_id, user_id)] = is_like
+        self._queued()
+
+    def rating(self, post_id: int, user_id: int, rating: int) -> None:
+        self._pending.ratings[(post_id, user_id)] = rating
+        self._queued()
+
+    def comment(self, post_id: int, user_id: int, content: str) -> None:
+        self._pending.comments.append((post_id, user_id, content))
+        self._queued()
+
+    def _queued(self) -> None:
+        if len(self._pending) >= self.max_pending:
+            self.flush()
+        elif not self._timer.isActive():
+            self._timer.start()
+
+    def flush(self) -> None:
+        """Start writing the pending batch unless a flush is already running."""
+        self._timer.stop()
+        if self._in_flight is not None or not len(self._pending):
+            return
+        batch, self._pending = self._pending, PendingWrites()
+        batch.username = self.username
+        self._in_flight = batch
+        self._task = self.runner.submit(
+            self.write, batch,
+            on_done=lambda post_ids: self._done(batch, post_ids),
+            on_error=lambda error: self._failed(batch, error)
+        )
+
+    def drain(self, on_done) -> None:
+        """Write the in-flight and pending batches on the runner, then call on_done.
+
+        Used at logout, so the session ends only after its actions are
+        committed. The batches are sent to the API as after a normal flush.
+        on_done is also called if the write fails, after ``failed`` has been
+        emitted.
+        """
+        batches = self._take_batches()
+        if not batches:
+            on_done()
+            return
+        self._draining = batches
+
+        def written(post_ids):
+            self._draining, self._drain_task = [], None
+            self.flushed.emit(post_ids)
+            for batch in batches:
+                self._sync(batch)
+            on_done()
+
+        def failed(error):
+            self._draining, self._drain_task = [], None
+            for batch in batches:
+                if not batch.written:
+                    self.failed.emit(error, batch.originals)
+            on_done()
+
+        self._drain_task = self.runner.submit(self._write_all, batches,
+                                              on_done=written, on_error=failed)
+
+    def flush_sync(self) -> None:
+        """Write every queued batch on the calling thread, in order.
+
+        Only for shutdown, before the runner's pool is cleared: flushes and
+        drains that have not started yet are cancelled and written here,
+        and one that is running is waited for. Each batch gets a single
+        short attempt to reach the API; one that fails is reported through
+        ``sync_failed`` and not retried.
+        """
+        if self._drain_task is not None:
+            self._drain_task.cancel()
+        batches = self._draining + self._take_batches()
+        self._draining, self._drain_task = [], None
+        self._write_all(batches)
+        for batch in batches:
+            if self.api is not None and batch.username is not None:
+                try:
+                    self.api.batch(batch.actions(), timeout=SHUTDOWN_SYNC_TIMEOUT, retry=False)
+                except Exception as e:
+                    self.sync_failed.emit(e)
+
+    def _take_batches(self) -> list:
+        """Take over the in-flight and pending batches, oldest first."""
+        self._timer.stop()
+        batches = []
+        if self._in_flight is not None:
+            self._task.cancel()
+            batches.append(self._in_flight)
+            self._in_flight = self._task = None
+        if len(self._pending):
+            batch, self._pending = self._pending, PendingWrites()
+            batch.username = self.username
+            batches.append(batch)
+        return batches
+
+    def _write_all(self, batches) -> set:
+        post_ids = set()
+        for batch in batches:
+            post_ids |= self.write(batch)
+        return post_ids
+
+    def write(self, batch: PendingWrites) -> set:
+        """Commit batch unless it already was; batches are written one at a time."""
+        with self._write_lock:
+            if not batch.written:
+                self._commit(batch)
+                batch.written = True
+        return batch.post_ids()
+
+    def _commit(self, batch: PendingWrites) -> None:
+        with self.db.transaction() as conn:
+            conn.executemany(REACTION_SQL, [
+                (post_id, user_id, is_like)
+                for (post_id, user_id), is_like in batch.reactions.items()
+            ])
+            conn.executemany(RATING_SQL, [
+                (user_id, post_id, rating)
+                for (post_id, user_id), rating in batch.ratings.items()
+            ])
+            conn.executemany(COMMENT_SQL, [
+                (content, user_id, post_id) for post_id, user_id, content in batch.comments
+            ])
+
+    def _done(self, batch: PendingWrites, post_ids) -> None:
+        if batch is not self._in_flight:
+            # drain or flush_sync already took over this batch.
+            return
+        self._in_flight = self._task = None
+        self.flushed.emit(post_ids)
+        self._sync(batch)
+        if len(self._pending):
+            self._timer.start()
+
+    def _failed(self, batch: PendingWrites, error) -> None:
+        if batch is not self._in_flight:
+            return
+        self._in_flight = self._task = None
+        self.failed.emit(error, batch.originals)
+        if len(self._pending):
+            self._timer.start()
+
+    def _sync(self, batch: PendingWrites) -> None:
+        if self.api is not None and batch.username is not None:
+            self.runner.submit(self.api.batch, batch.actions(), on_error=self.sync_failed.emit)